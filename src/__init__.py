@@ -34,6 +34,7 @@ bl_info = {
 
 import bpy
 from . import property_group, panels, operators
+from .api import ExportConfig, exportTree
 import sys, importlib
 to_reload = [module for (m_name, module) in sys.modules.items() if __package__ and m_name.startswith(__package__)]
 for module in to_reload:
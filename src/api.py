@@ -0,0 +1,79 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+
+# Context-free export functions for scripts and other add-ons, e.g.:
+#
+#   api = importlib.import_module(<add-on module> + '.api')
+#   config = api.ExportConfig.fromContext()
+#   for material in bpy.data.materials:
+#       svg = api.exportTree(material.node_tree, config)
+#
+# Nothing is read from the UI; state derived from the configuration is shared across calls.
+
+import io
+import os
+import json
+
+from . import snapshot
+from . import colorspace
+from .config import ExportConfig
+from .converter import Renderer
+
+
+def renderTree(node_tree, config: ExportConfig, nodes=None, rect=None) -> Renderer:
+    """Returns a Renderer of the Nodes (all of them unless specified) of a node tree.
+
+    With rect (min_x, min_y, max_x, max_y in view space), only Nodes intersecting it (as they are drawn) are rendered."""
+
+    config = ExportConfig.of(config)
+    # colors of widgets are converted while taking the snapshot
+    colorspace.COLOR_SPACE = colorspace.getColorSpace(config['display_device'])
+    tree_snapshot = snapshot.extractTree(node_tree, args={'quality': config['fidelity']}, nodes=nodes)
+    return Renderer(tree_snapshot, config, rect=rect)
+
+
+def exportTree(node_tree, config: ExportConfig, f=None, nodes=None, rect=None, workers=1, cache=None, pool=None) -> None | bytes:
+    """Exports a node tree into an SVG document.
+
+    The document is streamed into the binary file handle f, or returned as bytes without it.
+    See Renderer.write() for the rendering options; the configuration decides about minification."""
+
+    if f is None:
+        with io.BytesIO() as buffer:
+            exportTree(node_tree, config, f=buffer, nodes=nodes, rect=rect, workers=workers, cache=cache, pool=pool)
+            return buffer.getvalue()
+
+    renderer = renderTree(node_tree, config, nodes=nodes, rect=rect)
+    renderer.writeDocument(f, workers=workers, cache=cache, pool=pool)
+    return None
+
+
+def idMapPath(path: str) -> str:
+    """Returns the path of the id map written next to an output file."""
+
+    return os.path.splitext(path)[0] + '.ids.json'
+
+
+def writeIdMap(renderer: Renderer, path: str) -> None:
+    """Writes the short ids of a minified export mapped to the regular ones next to the output at path."""
+
+    with open(idMapPath(path), 'w') as f:
+        json.dump(renderer.idMap(), f, indent=1)
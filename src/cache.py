@@ -0,0 +1,222 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+import os
+import re
+import json
+import struct
+import hashlib
+from collections import OrderedDict
+
+# default cap of the in-memory cache
+DEFAULT_CACHE_SIZE = 64 * 2**20
+
+# default cap of the on-disk cache
+DEFAULT_DISK_CACHE_SIZE = 256 * 2**20
+
+# version of the entry format, part of the on-disk cache's salt
+CACHE_FORMAT = 3
+
+# files of the on-disk cache are named by their SHA-1 and sorted into directories by its first byte
+DISK_ENTRY_NAME = re.compile(r'[0-9a-f]{40}')
+DISK_DIR_NAME = re.compile(r'[0-9a-f]{2}')
+
+
+def fragmentSize(fragment) -> int:
+    parts, resources = fragment
+    return sum(len(data) for data in parts) + len(repr(resources))
+
+
+class FragmentCache():
+    """Least-recently-used cache of serialized SVG fragments, capped by their total size in bytes.
+
+    A fragment is a tuple of the serialized top-level elements and the resources they use (see defs.py)."""
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE) -> None:
+        self.entries = OrderedDict()
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> None | tuple:
+        fragment = self.entries.get(key)
+        if fragment is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return fragment
+
+    def put(self, key, fragment: tuple) -> None:
+        if key in self.entries:
+            self.size -= fragmentSize(self.entries.pop(key))
+        self.entries[key] = fragment
+        self.size += fragmentSize(fragment)
+        self.evict()
+
+    def evict(self) -> None:
+        while self.size > self.max_size and self.entries:
+            _, fragment = self.entries.popitem(last=False)
+            self.size -= fragmentSize(fragment)
+
+    def resize(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.evict()
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+    def resetStats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+
+# shared by all exports of a Blender session
+FRAGMENTS = FragmentCache()
+
+
+def packFragment(fragment: tuple) -> bytes:
+    parts, resources = fragment
+    # resources are stored as the last part
+    parts = (*parts, json.dumps(resources).encode('utf-8'))
+    header = struct.pack(f'>I{len(parts)}I', len(parts), *[len(data) for data in parts])
+    return header + b''.join(parts)
+
+def unpackFragment(packed: bytes) -> tuple:
+    count, = struct.unpack_from('>I', packed)
+    lengths = struct.unpack_from(f'>{count}I', packed, 4)
+    offset = 4 + 4*count
+    fragment = []
+    for length in lengths:
+        fragment.append(packed[offset:offset+length])
+        offset += length
+    if offset != len(packed) or not fragment:
+        raise ValueError("Corrupted cache entry")
+    resources = tuple((resource_id, kind, tuple(args)) for resource_id, kind, args in json.loads(fragment.pop()))
+    return tuple(fragment), resources
+
+
+class DiskCache():
+    """Content-addressed cache of serialized SVG fragments in a directory, shared across Blender sessions.
+
+    Entries are keyed by the fragment key and a salt (add-on and Blender version), so entries of other
+    versions are never read. Optionally backed by an in-memory FragmentCache in front of it."""
+
+    def __init__(self, path: str, max_size=DEFAULT_DISK_CACHE_SIZE, salt=(), front: None | FragmentCache = None) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.salt = salt
+        self.front = front
+        self.hits = 0
+        self.misses = 0
+
+    def entryPath(self, key) -> str:
+        digest = hashlib.sha1(repr((self.salt, key)).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest[:2], digest)
+
+    def load(self, key) -> None | tuple:
+        entry_path = self.entryPath(key)
+        try:
+            with open(entry_path, 'rb') as f:
+                fragment = unpackFragment(f.read())
+            # mark as recently used for eviction
+            os.utime(entry_path)
+        except (OSError, ValueError, TypeError, struct.error):
+            return None
+        return fragment
+
+    def store(self, key, fragment: tuple) -> None:
+        entry_path = self.entryPath(key)
+        temp_path = entry_path + f'.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(packFragment(fragment))
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            print("WARNING: Could not write to fragment cache:", e)
+
+    def get(self, key) -> None | tuple:
+        fragment = self.front.get(key) if self.front is not None else None
+        if fragment is None:
+            fragment = self.load(key)
+            if fragment is not None and self.front is not None:
+                self.front.put(key, fragment)
+        if fragment is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return fragment
+
+    def put(self, key, fragment: tuple) -> None:
+        if self.front is not None:
+            self.front.put(key, fragment)
+        self.store(key, fragment)
+
+    def entries(self) -> list[tuple[str, os.stat_result]]:
+        """Returns paths and stats of all cache entries in the directory (and nothing else found there)."""
+
+        found = []
+        if not os.path.isdir(self.path): return found
+        for directory in os.scandir(self.path):
+            if not directory.is_dir() or not DISK_DIR_NAME.fullmatch(directory.name): continue
+            for entry in os.scandir(directory.path):
+                if not entry.is_file() or not DISK_ENTRY_NAME.fullmatch(entry.name): continue
+                found.append((entry.path, entry.stat()))
+        return found
+
+    def trim(self) -> None:
+        """Evicts least recently used entries until the cache fits its size cap."""
+
+        entries = self.entries()
+        size = sum(stat.st_size for _, stat in entries)
+        if size <= self.max_size: return
+
+        entries.sort(key=lambda entry: entry[1].st_mtime)
+        for entry_path, stat in entries:
+            if size <= self.max_size: break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            size -= stat.st_size
+
+    def clear(self) -> None:
+        if self.front is not None:
+            self.front.clear()
+        for entry_path, _ in self.entries():
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+        if not os.path.isdir(self.path): return
+        for directory in os.scandir(self.path):
+            if not directory.is_dir() or not DISK_DIR_NAME.fullmatch(directory.name): continue
+            try:
+                os.rmdir(directory.path)
+            except OSError:
+                # not empty, holds something else than cache entries
+                pass
+
+    def resetStats(self) -> None:
+        self.hits = 0
+        self.misses = 0
@@ -20,7 +20,7 @@ This file is part of Node Exporter to SVG.
 
 from . import widgets
 from .widgets import dropdown, ramp, selectBar, image, curve, generateCustomProps
-from .methods import socketColorToSVGColor, enumName, getFloatString, colorCorrect, insertIntoSortedByKey
+from .methods import socketColorToSVGColor, enumName, getFloatString, colorCorrect
 from .constants import IGNORE_PROPS, CATEGORY_NAMES
 
 
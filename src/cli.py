@@ -0,0 +1,226 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+# Batch export of all node trees of a .blend file, for use in background mode:
+#
+#   blender -b file.blend -P path/to/add-on/cli.py -- --output "//svg/{blend}/{type}"
+#
+# The add-on has to be enabled in the user preferences, which also provide the export options.
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import bpy
+
+TREE_TYPES = ['material', 'world', 'compositor', 'geometry']
+
+MANIFEST_NAME = 'manifest.json'
+
+# same as writer.DEFAULT_COMPRESSION, which cannot be imported when run as a script
+DEFAULT_COMPRESSION = 6
+
+
+def collectTrees(types=TREE_TYPES) -> list[tuple[str, str, 'bpy.types.NodeTree']]:
+    """Returns (type, name, node tree) of all exportable node trees in the open file."""
+
+    trees = []
+
+    if 'material' in types:
+        for material in bpy.data.materials:
+            if material.node_tree is None or not material.use_nodes: continue
+            trees.append(('material', material.name_full, material.node_tree))
+
+    if 'world' in types:
+        for world in bpy.data.worlds:
+            if world.node_tree is None or not world.use_nodes: continue
+            trees.append(('world', world.name_full, world.node_tree))
+
+    if 'compositor' in types:
+        for scene in bpy.data.scenes:
+            # Blender 5.0 moved the compositor into a regular node group
+            node_tree = getattr(scene, 'compositing_node_group', None)
+            if node_tree is None and getattr(scene, 'use_nodes', False):
+                node_tree = scene.node_tree
+            if node_tree is None: continue
+            trees.append(('compositor', scene.name_full, node_tree))
+
+    if 'geometry' in types:
+        for node_group in bpy.data.node_groups:
+            if node_group.bl_idname != 'GeometryNodeTree': continue
+            trees.append(('geometry', node_group.name_full, node_group))
+
+    return trees
+
+
+def exportTrees(output: str, manifest_path: None | str = None, types=TREE_TYPES, workers=None, compression_level=None) -> dict:
+    """Exports node trees of the open file into directories given by the pattern output, writing a manifest.
+
+    The pattern may contain fields {blend} (name of the .blend file) and {type} (one of TREE_TYPES)
+    and may be relative to the .blend file ('//'). With a compression level, .svgz files are written."""
+
+    # imported here, as the file is also run as a plain script (see bottom)
+    from .api import ExportConfig, renderTree, writeIdMap
+    from .operators import getFragmentCache
+    from .cache import DiskCache
+    from .writer import openOutput, SVGZ_EXTENSION
+    from .parallel import renderPool
+
+    context = bpy.context
+    props = context.preferences.addons[__package__].preferences
+
+    if workers is None:
+        workers = props.render_workers
+
+    fragment_cache = getFragmentCache(props)
+
+    # started once, shared by all exported trees
+    pool = renderPool(workers) if workers > 1 else None
+
+    # read once, shared by all exported trees
+    config = ExportConfig.fromContext(context)
+
+    blend_name = bpy.path.display_name_from_filepath(bpy.data.filepath) or 'untitled'
+
+    extension = '.svg' if compression_level is None else SVGZ_EXTENSION
+
+    manifest = {
+        'blend': bpy.data.filepath,
+        'blender': bpy.app.version_string,
+        'outputs': []
+    }
+    used_paths = set()
+    total_start = time.perf_counter()
+
+    try:
+        for tree_type, name, node_tree in collectTrees(types):
+
+            start = time.perf_counter()
+            try:
+                directory = bpy.path.abspath(output.format(blend=blend_name, type=tree_type))
+                os.makedirs(directory, exist_ok=True)
+
+                path = os.path.join(directory, bpy.path.clean_name(name)+extension)
+                if path in used_paths:
+                    # the pattern does not separate types
+                    path = os.path.join(directory, tree_type+'_'+bpy.path.clean_name(name)+extension)
+                used_paths.add(path)
+
+                renderer = renderTree(node_tree, config)
+                with openOutput(path, compression_level) as f:
+                    renderer.writeDocument(f, workers=workers, cache=fragment_cache, pool=pool)
+                    # before compression
+                    svg_size = f.tell()
+                size = os.path.getsize(path)
+                if config['minify'] and props.write_id_map:
+                    writeIdMap(renderer, path)
+            except Exception as e:
+                print(f"WARNING: Could not export {tree_type} '{name}':", e)
+                manifest['outputs'].append({
+                    'type': tree_type,
+                    'name': name,
+                    'error': str(e)
+                })
+                continue
+
+            manifest['outputs'].append({
+                'type': tree_type,
+                'name': name,
+                'path': path,
+                'nodes': len(node_tree.nodes),
+                'bytes': size,
+                'svg_bytes': svg_size,
+                'seconds': round(time.perf_counter() - start, 4)
+            })
+            print(f"Node Exporter to SVG: {tree_type} '{name}' -> {path}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if isinstance(fragment_cache, DiskCache):
+        fragment_cache.trim()
+
+    manifest['seconds'] = round(time.perf_counter() - total_start, 4)
+    manifest['bytes'] = sum(entry.get('bytes', 0) for entry in manifest['outputs'])
+    if fragment_cache is not None:
+        manifest['cache'] = {'hits': fragment_cache.hits, 'misses': fragment_cache.misses}
+
+    if manifest_path is None:
+        exported = [os.path.dirname(entry['path']) for entry in manifest['outputs'] if 'path' in entry]
+        directory = os.path.commonpath(exported) if exported else bpy.path.abspath(output.format(blend=blend_name, type=''))
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+    else:
+        manifest_path = bpy.path.abspath(manifest_path)
+
+    os.makedirs(os.path.dirname(manifest_path) or '.', exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def main(argv: list[str]) -> int:
+
+    parser = argparse.ArgumentParser(
+        prog='blender -b file.blend -P cli.py --',
+        description="Exports all node trees of a .blend file to SVG."
+    )
+    parser.add_argument('-o', '--output', default='//svg/{blend}/{type}',
+                        help="output directory pattern with optional fields {blend} and {type} (default: %(default)s)")
+    parser.add_argument('-m', '--manifest', default=None,
+                        help=f"path of the JSON manifest (default: {MANIFEST_NAME} in the common output directory)")
+    parser.add_argument('-t', '--types', nargs='+', choices=TREE_TYPES, default=TREE_TYPES,
+                        help="types of node trees to export (default: all)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="number of rendering processes (default: from the preferences)")
+    parser.add_argument('-z', '--svgz', nargs='?', type=int, const=DEFAULT_COMPRESSION, default=None, choices=range(1, 10), metavar='LEVEL',
+                        help=f"write gzip-compressed .svgz files, optionally with a compression level 1-9 (default: {DEFAULT_COMPRESSION})")
+    args = parser.parse_args(argv)
+
+    manifest = exportTrees(args.output, manifest_path=args.manifest, types=args.types, workers=args.workers, compression_level=args.svgz)
+
+    return 1 if any('error' in entry for entry in manifest['outputs']) else 0
+
+
+def findPackage():
+    """Returns the name under which Blender loaded the add-on containing this script."""
+
+    init_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__init__.py')
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, '__file__', None)
+        if module_file and os.path.abspath(module_file) == init_path:
+            return name
+    return None
+
+
+if __name__ == '__main__':
+
+    # arguments after '--' are left to the script by Blender
+    argv = sys.argv[sys.argv.index('--')+1:] if '--' in sys.argv else []
+
+    package = findPackage()
+    if package is None:
+        print("ERROR: Node Exporter to SVG is not enabled in the preferences.")
+        sys.exit(2)
+
+    import importlib
+    sys.exit(importlib.import_module(package+'.cli').main(argv))
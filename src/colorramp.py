@@ -0,0 +1,315 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+# Evaluation of color ramps without Blender, following BKE_colorband_evaluate() in
+# source/blender/blenkernel/intern/colorband.cc (Blender's source code, distributed under
+# the same license as this add-on). All samples of a ramp are evaluated in one sweep,
+# instead of one ColorRamp.evaluate() call through RNA for each of them.
+
+from array import array
+
+# interpolations of colors before the first and after the last element
+FLAT_INTERPOLATIONS = ('LINEAR', 'EASE', 'CONSTANT')
+
+# largest difference of a color channel from ColorRamp.evaluate(), which computes in single precision
+TOLERANCE = 1e-4
+
+# number of samples compared with ColorRamp.evaluate()
+SPOT_CHECKS = 4
+
+# largest deviation of gradients from the ramp in 8-bit levels, and the number of times intervals
+# between their stops are halved at most to stay within it
+GRADIENT_TOLERANCE = 1.0
+GRADIENT_DEPTH = 10
+
+# positions between stops checked against the linear interpolation of the stops
+GRADIENT_CHECKS = (0.25, 0.5, 0.75)
+
+
+def cardinalWeights(t: float) -> tuple[float, float, float, float]:
+    t2 = t * t
+    t3 = t2 * t
+    fc = 0.71
+    return (
+        -fc * t3 + 2.0 * fc * t2 - fc * t,
+        (2.0 - fc) * t3 + (fc - 3.0) * t2 + 1.0,
+        (fc - 2.0) * t3 + (3.0 - 2.0 * fc) * t2 + fc * t,
+        fc * t3 - fc * t2
+    )
+
+def bSplineWeights(t: float) -> tuple[float, float, float, float]:
+    t2 = t * t
+    t3 = t2 * t
+    return (
+        -0.16666666 * t3 + 0.5 * t2 - 0.5 * t + 0.16666666,
+        0.5 * t3 - t2 + 0.66666666,
+        -0.5 * t3 + 0.5 * t2 + 0.5 * t + 0.16666666,
+        0.16666666 * t3
+    )
+
+
+# color conversions of Blender (math_color.cc), which differ from colorsys outside of [0, 1]
+
+def rgbToHSV(r: float, g: float, b: float) -> tuple[float, float, float]:
+    k = 0.0
+    if g < b:
+        g, b = b, g
+        k = -1.0
+    min_gb = b
+    if r < g:
+        r, g = g, r
+        k = -2.0 / 6.0 - k
+        min_gb = min(g, b)
+    chroma = r - min_gb
+    return abs(k + (g - b) / (6.0 * chroma + 1e-20)), chroma / (r + 1e-20), r
+
+def rgbToHSL(r: float, g: float, b: float) -> tuple[float, float, float]:
+    cmax, cmin = max(r, g, b), min(r, g, b)
+    l = min(1.0, (cmax + cmin) / 2.0)
+    if cmax == cmin:
+        return 0.0, 0.0, l
+    d = cmax - cmin
+    s = d / (2.0 - cmax - cmin) if l > 0.5 else d / (cmax + cmin)
+    if cmax == r:
+        h = (g - b) / d + (6.0 if g < b else 0.0)
+    elif cmax == g:
+        h = (b - r) / d + 2.0
+    else:
+        h = (r - g) / d + 4.0
+    return h / 6.0, s, l
+
+def hueChannels(h: float) -> tuple[float, float, float]:
+    return (
+        min(max(abs(h * 6.0 - 3.0) - 1.0, 0.0), 1.0),
+        min(max(2.0 - abs(h * 6.0 - 2.0), 0.0), 1.0),
+        min(max(2.0 - abs(h * 6.0 - 4.0), 0.0), 1.0)
+    )
+
+def hsvToRGB(h: float, s: float, v: float) -> tuple[float, float, float]:
+    return tuple(((n - 1.0) * s + 1.0) * v for n in hueChannels(h))
+
+def hslToRGB(h: float, s: float, l: float) -> tuple[float, float, float]:
+    chroma = (1.0 - abs(2.0 * l - 1.0)) * s
+    return tuple((n - 0.5) * chroma + l for n in hueChannels(h))
+
+
+def hueInterpolate(hue_interpolation: str, mfac: float, fac: float, h1: float, h2: float) -> float:
+    """Interpolates hues h1 (weighted by mfac) and h2 (by fac) around the hue circle."""
+
+    h1 = h1 if h1 < 1.0 else h1 - 1.0
+    h2 = h2 if h2 < 1.0 else h2 - 1.0
+
+    mode = 0
+    match hue_interpolation:
+        case 'NEAR':
+            if h1 < h2 and h2 - h1 > 0.5: mode = 1
+            elif h1 > h2 and h2 - h1 < -0.5: mode = 2
+        case 'FAR':
+            # full loop when both hues are the same
+            if h1 == h2: mode = 1
+            elif h1 < h2 and h2 - h1 < 0.5: mode = 1
+            elif h1 > h2 and h2 - h1 > -0.5: mode = 2
+        case 'CCW':
+            if h1 > h2: mode = 2
+        case 'CW':
+            if h1 < h2: mode = 1
+
+    match mode:
+        case 1:
+            h = mfac * (h1 + 1.0) + fac * h2
+        case 2:
+            h = mfac * h1 + fac * (h2 + 1.0)
+        case _:
+            return mfac * h1 + fac * h2
+    return h if h < 1.0 else h - 1.0
+
+
+class ColorRamp():
+    """Copy of a color ramp's settings and elements (positions and RGBA colors), evaluated as in Blender."""
+
+    def __init__(self, elements: list[tuple[float, tuple[float, float, float, float]]], color_mode='RGB', interpolation='LINEAR', hue_interpolation='NEAR') -> None:
+        self.elements = elements
+        self.color_mode = color_mode
+        self.hue_interpolation = hue_interpolation
+        # hue interpolations are always linear
+        self.interpolation = interpolation if color_mode == 'RGB' else 'LINEAR'
+
+    @classmethod
+    def fromRamp(cls, color_ramp: 'bpy.types.ColorRamp') -> 'ColorRamp':
+        """Reads the elements of a ramp once."""
+
+        return cls(
+            [(element.position, tuple(element.color)) for element in color_ramp.elements],
+            color_ramp.color_mode,
+            color_ramp.interpolation,
+            color_ramp.hue_interpolation
+        )
+
+    def evaluate(self, positions: list[float]) -> list[tuple[float, float, float, float]]:
+        """Returns the colors at ascending positions."""
+
+        if not self.elements: return [(0.0, 0.0, 0.0, 0.0) for _ in positions]
+
+        colors = []
+        a = 0
+        # positions are single precision in Blender, which matters for comparing them with those of elements
+        for position in array('f', positions):
+            # first element after the position
+            while a < len(self.elements) and self.elements[a][0] <= position:
+                a += 1
+            colors.append(self.evaluateAt(position, a))
+        return colors
+
+    def segments(self) -> list[tuple[float, float, tuple[float, float, float, float]]]:
+        """Returns the intervals of a constant ramp with their colors, those of equal colors merged."""
+
+        positions = [min(max(position, 0.0), 1.0) for position, _ in self.elements]
+        # the first color also reaches to the start
+        starts = [0.0, *positions[1:]]
+        ends = [*positions[1:], 1.0]
+
+        segments = []
+        for start, end, (_, color) in zip(starts, ends, self.elements):
+            if segments and segments[-1][2] == color:
+                segments[-1] = (segments[-1][0], end, color)
+            elif end > start:
+                segments.append((start, end, color))
+        return segments
+
+    def gradientStops(self, to_levels, tolerance=GRADIENT_TOLERANCE, max_depth=GRADIENT_DEPTH) -> list[tuple[float, tuple[int, ...]]]:
+        """Returns positions and output levels (converted by to_levels) of gradient stops drawing the ramp.
+
+        Constant ramps change at pairs of stops of the same position. Other ramps get a stop at each element
+        and more between them where the gradient would deviate from the ramp by more than tolerance."""
+
+        if not self.elements: return []
+
+        if self.interpolation == 'CONSTANT':
+            stops = []
+            for start, end, color in self.segments():
+                levels = to_levels(color)
+                stops.extend([(start, levels), (end, levels)])
+            return stops
+
+        def levelsAt(position: float) -> tuple[int, ...]:
+            return to_levels(self.evaluate([position])[0])
+
+        def refine(start, start_levels, end, end_levels, depth) -> None:
+            # appends stops after start, up to end
+            checks = [start + fac*(end-start) for fac in GRADIENT_CHECKS]
+            deviates = any(
+                abs(level - (1.0-fac)*start_level - fac*end_level) > tolerance
+                for fac, position in zip(GRADIENT_CHECKS, checks)
+                for level, start_level, end_level in zip(levelsAt(position), start_levels, end_levels)
+            )
+            if depth > 0 and deviates:
+                middle = (start+end) / 2
+                middle_levels = levelsAt(middle)
+                refine(start, start_levels, middle, middle_levels, depth-1)
+                refine(middle, middle_levels, end, end_levels, depth-1)
+            else:
+                stops.append((end, end_levels))
+
+        breakpoints = sorted({0.0, 1.0, *[min(max(position, 0.0), 1.0) for position, _ in self.elements]})
+        stops = [(0.0, levelsAt(0.0))]
+        for start, end in zip(breakpoints[:-1], breakpoints[1:]):
+            refine(start, stops[-1][1], end, levelsAt(end), max_depth)
+
+        # stops between two of the same levels
+        return [
+            stop for i, stop in enumerate(stops)
+            if i == 0 or i == len(stops)-1 or not (stops[i-1][1] == stop[1] == stops[i+1][1])
+        ]
+
+    def evaluateAt(self, position: float, a: int) -> tuple[float, float, float, float]:
+        """Returns the color at a position, given the index of the first element after it."""
+
+        elements = self.elements
+        count = len(elements)
+        interpolation = self.interpolation
+
+        if count == 1:
+            return elements[0][1]
+        if position <= elements[0][0] and interpolation in FLAT_INTERPOLATIONS:
+            return elements[0][1]
+        if a == count and interpolation in FLAT_INTERPOLATIONS:
+            return elements[-1][1]
+
+        # the elements around the position, with the ramp's ends as elements of the outermost colors
+        if a == count:
+            right, left = (1.0, elements[-1][1]), elements[-1]
+        elif a == 0:
+            right, left = elements[0], (0.0, elements[0][1])
+        else:
+            right, left = elements[a], elements[a-1]
+
+        if interpolation == 'CONSTANT':
+            return left[1]
+
+        if left[0] != right[0]:
+            # weight of the left element
+            fac = (position - right[0]) / (left[0] - right[0])
+        else:
+            fac = 0.0 if a != count else 1.0
+
+        if interpolation in ('B_SPLINE', 'CARDINAL'):
+            # second elements to the right and left
+            right2 = right if a >= count - 1 else elements[a+1]
+            left2 = left if a < 2 else elements[a-2]
+
+            fac = min(max(fac, 0.0), 1.0)
+            t = cardinalWeights(fac) if interpolation == 'CARDINAL' else bSplineWeights(fac)
+
+            return tuple(
+                min(max(t[3] * c3 + t[2] * c2 + t[1] * c1 + t[0] * c0, 0.0), 1.0)
+                for c3, c2, c1, c0 in zip(left2[1], left[1], right[1], right2[1])
+            )
+
+        if interpolation == 'EASE':
+            fac2 = fac * fac
+            fac = 3.0 * fac2 - 2.0 * fac2 * fac
+        mfac = 1.0 - fac
+
+        (*rgb1, a1), (*rgb2, a2) = right[1], left[1]
+        alpha = mfac * a1 + fac * a2
+
+        match self.color_mode:
+            case 'HSV' | 'HSL':
+                to_space, from_space = (rgbToHSV, hsvToRGB) if self.color_mode == 'HSV' else (rgbToHSL, hslToRGB)
+                h1, s1, v1 = to_space(*rgb1)
+                h2, s2, v2 = to_space(*rgb2)
+                return (*from_space(
+                    hueInterpolate(self.hue_interpolation, mfac, fac, h1, h2),
+                    mfac * s1 + fac * s2,
+                    mfac * v1 + fac * v2
+                ), alpha)
+            case _:
+                return (*[mfac * c1 + fac * c2 for c1, c2 in zip(rgb1, rgb2)], alpha)
+
+
+def spotCheck(color_ramp: 'bpy.types.ColorRamp', positions: list[float], colors: list[tuple]) -> bool:
+    """Compares a few evaluated colors (evenly picked) with ColorRamp.evaluate()."""
+
+    step = max(1, len(positions) // SPOT_CHECKS)
+    for i in range(step // 2, len(positions), step):
+        reference = color_ramp.evaluate(positions[i])
+        if any(abs(x - y) > TOLERANCE for x, y in zip(colors[i], reference)):
+            return False
+    return True
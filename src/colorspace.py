@@ -0,0 +1,146 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+# Color management of the output, converting Blender's linear colors into SVG color strings.
+# The display device is read from the scene once per export (see methods.getConfigurationFromContext),
+# so that no conversion needs bpy and rendering worker processes convert colors the same way.
+
+from bisect import bisect_right
+from functools import cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# below this many colors, the overhead of NumPy outweighs its speed
+NUMPY_THRESHOLD = 64
+
+# memoized color strings are dropped past this many
+MEMO_SIZE = 2**16
+
+
+# based on: https://github.com/blender/blender/blob/594f47ecd2d5367ca936cf6fc6ec8168c2b360d0/source/blender/blenlib/intern/math_color.c
+# (which is Blender's source code)
+# it is distributed under the same license as this add-on
+def linearRGBtoSRGB(value: float) -> float:
+  if value < 0.0031308:
+    return 0.0 if value < 0.0 else value * 12.92
+
+  return 1.055 * value**(1.0 / 2.4) - 0.055
+
+
+def rgbString(levels: list[int]) -> str:
+    return "rgb("+",".join([str(x) for x in levels])+")"
+
+def srgbLevel(value: float) -> int:
+    return round(linearRGBtoSRGB(value)*255)
+
+@cache
+def srgbThresholds() -> tuple[float]:
+    """Returns the lowest linear value converted to each 8-bit sRGB level from 1 to 255.
+
+    The number of thresholds not above a linear value in [0, 1] is its exact 8-bit sRGB level."""
+
+    thresholds = []
+    # highest value known to be below the level
+    below = 0.0
+    for level in range(1, 256):
+        above = 1.0
+        # bisection down to adjacent floats
+        while (middle := (below+above)/2) not in (below, above):
+            if srgbLevel(middle) >= level:
+                above = middle
+            else:
+                below = middle
+        thresholds.append(above)
+    return tuple(thresholds)
+
+
+class ColorSpace():
+    """Converts colors for a display device, memoizing the SVG color strings.
+
+    Only the sRGB display device is color-corrected, colors of other devices are written as they are."""
+
+    def __init__(self, display_device='sRGB') -> None:
+        self.display_device = display_device
+        self.srgb = display_device == 'sRGB'
+        self.strings = {}
+
+    def correct(self, value: float) -> float:
+        return linearRGBtoSRGB(value) if self.srgb else value
+
+    def level(self, value: float) -> int:
+        """Returns the 8-bit level of a color channel after color correction."""
+
+        if self.srgb and 0.0 <= value <= 1.0:
+            return bisect_right(srgbThresholds(), value)
+        return round(self.correct(value)*255)
+
+    def levels(self, color: list[float], corrected=True) -> tuple[int, int, int]:
+        """Returns the 8-bit levels of a color, color-corrected unless it already is."""
+
+        if corrected:
+            return tuple(round(x*255) for x in color[:3])
+        return tuple(self.level(x) for x in color[:3])
+
+    def svgColor(self, color: list[float], corrected=True) -> str:
+        """Returns the rgb() string of a color, color-corrected unless it already is."""
+
+        key = (*color[:3], corrected)
+        string = self.strings.get(key)
+        if string is None:
+            string = rgbString(self.levels(color, corrected))
+            if len(self.strings) >= MEMO_SIZE:
+                self.strings.clear()
+            self.strings[key] = string
+        return string
+
+    def svgColors(self, colors: list[list[float]], corrected=True) -> list[str]:
+        """Returns the rgb() strings of many colors, converted all at once with NumPy when available."""
+
+        if np is None or len(colors) < NUMPY_THRESHOLD:
+            return [self.svgColor(color, corrected) for color in colors]
+
+        values = np.array([color[:3] for color in colors], dtype=np.float64)
+        if corrected or not self.srgb:
+            levels = np.rint(values*255).astype(np.int64)
+        else:
+            levels = np.searchsorted(np.array(srgbThresholds()), values, side='right')
+            # outside of the thresholds' range
+            for i, j in zip(*np.nonzero(~((values >= 0.0) & (values <= 1.0)))):
+                levels[i, j] = self.level(float(values[i, j]))
+
+        return [rgbString(rgb) for rgb in levels.tolist()]
+
+
+# by display device, shared by all exports
+COLOR_SPACES = {}
+
+def getColorSpace(display_device: str) -> ColorSpace:
+
+    color_space = COLOR_SPACES.get(display_device)
+    if color_space is None:
+        color_space = COLOR_SPACES[display_device] = ColorSpace(display_device)
+    return color_space
+
+
+# color space of the export being rendered, set by the Renderer (and for taking its snapshot)
+COLOR_SPACE = getColorSpace('sRGB')
@@ -0,0 +1,77 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+
+from collections.abc import Mapping
+
+from . import methods
+
+
+class ExportConfig(Mapping):
+    """Immutable configuration of an export: colors, detail, outline and output options.
+
+    Read-only mapping of the keys produced by methods.getConfigurationFromContext(). Configurations
+    are hashable by content, so that state derived from them (CSS, widget settings, cache keys)
+    is computed once and shared by all exports using an equal configuration."""
+
+    def __init__(self, values: Mapping = {}, **overrides) -> None:
+        self._values = dict(values)
+        self._values.update(overrides)
+        self.key = methods.stateHash(self._values)
+
+    @classmethod
+    def fromContext(cls, context=None, **overrides) -> 'ExportConfig':
+        """Reads the configuration from the add-on's preferences and the current theme."""
+
+        if context is None:
+            context = methods.bpy.context
+        return cls(methods.getConfigurationFromContext(context), **overrides)
+
+    @classmethod
+    def of(cls, config: Mapping) -> 'ExportConfig':
+        return config if isinstance(config, cls) else cls(config)
+
+    def replace(self, **overrides) -> 'ExportConfig':
+        """Returns a copy of the configuration with some of the values changed."""
+
+        return ExportConfig(self._values, **overrides)
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ExportConfig):
+            return self.key == other.key
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return f'ExportConfig({self._values!r})'
+
+    def state(self) -> str:
+        return self.key
@@ -20,9 +20,6 @@ This file is part of Node Exporter to SVG.
 
 from math import floor
 
-# ratio of actual node frame dimensions to the bpy object
-NODE_DIM_RATIO = 0.8
-
 # specific heights
 HEADER_HEIGHT = 20
 TOP_PADDING = 6.5
@@ -34,6 +31,14 @@ SOCKET_TEXT_PADDING = 10
 
 SOCKET_TEXT_HEIGHT = 11
 
+# size of all texts, in px
+FONT_SIZE = 10
+
+# collapsed nodes; the radius grows by a step for every socket above the count
+HIDDEN_NODE_RADIUS = 15
+HIDDEN_NODE_SOCKET_STEP = 5
+HIDDEN_NODE_SOCKETS = 4
+
 # colors
 HEADER_OPACITY = 38
 
@@ -19,59 +19,23 @@ This file is part of Node Exporter to SVG.
 '''
 
 from . import constants
-from . import categories
 from . import widgets
 from . import methods
 from . import node
+from . import writer
+from . import parallel
+from . import snapshot
+from . import spatial
+from . import links
+from . import marker
+from . import minify
+from . import defs
+from . import colorspace
+from .config import ExportConfig
 
-import bpy
 import xml.etree.ElementTree as ET
 
-from colorsys import rgb_to_hsv, hsv_to_rgb
-from math import sin, cos, pi, inf
-from re import search
-
-MARKER_DEFS = {
-    'circle': ('circle',{
-                            'cx':f'{constants.MARKER_BOX_HALF}',
-                            'cy':f'{constants.MARKER_BOX_HALF}',
-                            'r':f'{constants.MARKER_SIZE/2}',
-                            'class':'marker'
-                            }),
-    'square':('rect',{
-                            'x':'0',
-                            'y':'0',
-                            'width':f'{constants.MARKER_SIZE}',
-                            'height':f'{constants.MARKER_SIZE}',
-                            'class':'marker'
-                            }),
-    'diamond':('polygon',{
-                            'points':f'\
-                            {constants.MARKER_LINE/2} {constants.MARKER_BOX_HALF} \
-                            {constants.MARKER_BOX_HALF} {constants.MARKER_LINE/2} \
-                            {constants.MARKER_SIZE+constants.MARKER_LINE/2} {constants.MARKER_BOX_HALF} \
-                            {constants.MARKER_BOX_HALF} {constants.MARKER_SIZE+constants.MARKER_LINE/2} \
-                            ',
-                            'class':'marker'
-                            }),
-    'dot':('circle',{       
-                            'cx':f'{constants.MARKER_BOX_HALF}',
-                            'cy':f'{constants.MARKER_BOX_HALF}',
-                            'r':f'{constants.MARKER_DOT_RADIUS}',
-                            'class':'marker_dot'
-                            })
-    }
-
-ARROW_DEFS = {
-    'right':('polyline',{
-        'points': '5 2 8 5 5 8',
-        'class': 'arrow'
-    }),
-    'down':('polyline', {
-        'points': '2 5 5 8 8 5',
-        'class': 'arrow'
-    })
-}
+from collections import OrderedDict
 
 def nodeFactory(n, colors, args) -> node.UINode:
 
@@ -84,87 +48,169 @@ def nodeFactory(n, colors, args) -> node.UINode:
             if n.hide: return node.UIHiddenNode(n, colors=colors, args=args)
             return node.UINodeRegular(n, colors=colors, args=args)
 
-class Converter():
+class RenderState():
+    """State derived from an ExportConfig alone, shared by all exports using an equal configuration."""
 
-    def __init__(self, context) -> None:
-        
-        # obtain node tree
-        nodetree = context.space_data.node_tree
-
-        # obtain properties
-        props = context.preferences.addons[__package__].preferences
+    def __init__(self, config: 'ExportConfig') -> None:
 
-        self.colors = methods.getConfigurationFromContext(context)
+        self.key = config.key
 
-        self.transparent_bg = props.transparent_background
-        self.quality = props.fidelity
-        self.use_gradient = props.use_gradients
+        self.widget_args = {
+            'quality': config['fidelity'],
+            'use_gradient': config['use_gradients'],
+            'corner_s': '3px' if config['rounded_corners'] else '0',
+            'corner_l': '5px' if config['rounded_corners'] else '0',
+            'clip_text': config['clip_text'],
+            'reuse_elements': config['reuse_elements'],
+            'style_classes': config['style_classes']
+        }
 
-        widget_args = {
-            'quality': self.quality,
-            'use_gradient': self.use_gradient,
-            'corner_s': '3px' if props.rounded_corners else '0',
-            'corner_l': '5px' if props.rounded_corners else '0', 
+        self.number_format = {
+            'decimals': config['precision'],
+            'strip_zeros': config['strip_zeros']
         }
 
-        widgets.PROPERTIES = widget_args
-        widgets.FLAGS = set()
+        self.color_space = colorspace.getColorSpace(config['display_device'])
+
+        self.css, self.css_rules = self.makeCSS(config)
+
+    def makeCSS(self, colors) -> tuple[str, dict[str, list[str]]]:
+        """Returns the CSS for all documents and the rules of each class, only written if the class is used."""
+
+        css = '\n\t\t\t'.join([
 
-        widget_args['scale'] = context.preferences.view.ui_scale
+            "",
+
+            # texts
+            "text { font-family: sans-serif, arial; font-size: "+str(constants.FONT_SIZE)+"px; fill: "+colors['text_base']+" }",
+
+            # generic
+            "rect { stroke-width:"+str(colors['outline_thickness'])+";stroke:"+colors['outline_color']+" }",
+
+            ""
+        ])
+
+        class_rules = [
+
+            # texts
+            ('string', ".string text { fill: "+colors['text_string']+" }"),
+            ('bool_true', ".bool_true  text { fill: "+colors['text_boolean_true'] +" }"),
+            ('bool_false', ".bool_false text { fill: "+colors['text_boolean_false']+" }"),
+            ('dropdown', ".dropdown text { fill: "+colors['text_dropdown']+" }"),
+            ('value', ".value text { fill: "+colors['text_slider']+" }"),
+
+            # corners
+            ('corner_l', ".corner_l { rx:" + colors['round_l'] + " }"),
+            ('corner_s', ".corner_s { rx:" + colors['round_s'] + " }"),
+
+            # generic
+            ('nodeframe', ".nodeframe { fill:"+colors['color_base']+" } "),
+            ('marker', ".marker { stroke-width: "+str(constants.MARKER_LINE)+"px; stroke: black}"),
+            ('arrow', ".arrow { stroke-width: 1; stroke: white; fill:none}"),
+
+            # booleans
+            ('checkmark', ".checkmark { stroke:"+colors['color_checkmark']+" } "),
+            ('bool_false', ".bool_false {fill:"+colors['color_bool_false']+"}"),
+            ('bool_true', ".bool_true  {fill:"+colors['color_bool_true'] +"}"),
+
+            # values
+            ('value_bar', ".value_bar {fill:"+colors['color_value_field']+"}"),
+            ('progress_bar', ".progress_bar {fill:"+colors['color_value_progress']+"}"),
+
+            # strings
+            ('string', ".string { fill:"+colors['color_string_field']+"}"),
+
+            # dropdowns
+            ('dropdown', ".dropdown { fill:"+colors['color_dropdown']+"}"),
+
+            # axes
+            ('axis_x', ".axis_x {stroke:"+colors['color_axis_x']+"}"),
+            ('axis_y', ".axis_y {stroke:"+colors['color_axis_y']+"}"),
+            ('axis_z', ".axis_z {stroke:"+colors['color_axis_z']+"}"),
+            ('axis_w', ".axis_w {"+"stroke:black"+"}"),
+
+            # sockets
+            *([
+                (name.lower(), ".marker ."+name.lower()+" { fill: "+colors['socket_color_'+name.lower()]+" }") for name in constants.SOCKET_COLORS.keys()
+            ]),
+
+            # background
+            ('bg', ".bg { stroke-width: 0; fill:"+colors['color_background']+"}"),
+        ]
+
+        css_rules = {}
+        for class_name, rule in class_rules:
+            css_rules.setdefault(class_name, []).append(rule)
+
+        return css, css_rules
+
+
+# most recently used RenderStates by configuration key
+RENDER_STATES = OrderedDict()
+RENDER_STATES_SIZE = 8
+
+def getRenderState(config: 'ExportConfig') -> RenderState:
+
+    state = RENDER_STATES.get(config.key)
+    if state is None:
+        state = RENDER_STATES[config.key] = RenderState(config)
+        while len(RENDER_STATES) > RENDER_STATES_SIZE:
+            RENDER_STATES.popitem(last=False)
+    else:
+        RENDER_STATES.move_to_end(config.key)
+    return state
+
+
+class Renderer():
+    """Renders a TreeSnapshot into SVG. Does not access bpy, all data comes from the snapshot and configuration."""
+
+    def __init__(self, snapshot: 'snapshot.TreeSnapshot', config: 'ExportConfig | dict', rect=None) -> None:
+
+        config = ExportConfig.of(config)
+        self.render_state = getRenderState(config)
+
+        self.colors = config
+
+        self.transparent_bg = config['transparent_background']
+        self.quality = config['fidelity']
+        self.use_gradient = config['use_gradients']
+
+        widget_args = self.render_state.widget_args
+
+        # Nodes are laid out with it
+        self.applyState()
 
         self.nodes = []
         self.node_frames = []
 
-        self.links = [
-            (link.from_socket.as_pointer(), link.to_socket.as_pointer(), False) for link in nodetree.links
-        ]
+        self.links = list(snapshot.links)
 
-        self.curving = context.preferences.themes[0].node_editor.noodle_curving
+        self.curving = config['noodliness']
+        self.merge_links = config['merge_links']
+        self.merge_markers = config['merge_markers']
+        self.number_key = (config['precision'], config['strip_zeros'])
+        self.minify = config['minify']
+        self.group_elements = config['group_elements']
+        self.keep_metadata = config['keep_metadata']
+        self.style_classes = config['style_classes']
 
         self.anchor_refs = {}
 
-        filtered_nodes = []
-        region_w = context.region.width
-        region_h = context.region.height
-        for n in nodetree.nodes:
-            if props.export_selected_only:
-                if not n.select: continue
-            if props.export_viewport_only:
-                node_ul = n.location[0]-n.width/2, n.location[1]
-                node_lr = n.location[0]+n.width/2, n.location[1]-n.height
-                view_ul = context.region.view2d.view_to_region(*node_ul)
-                view_lr = context.region.view2d.view_to_region(*node_lr)
-                if view_ul[0] > 10000: continue
-                if view_lr[0] > region_w: continue
-                if view_ul[1] > 10000: continue
-                if view_lr[1] > region_h: continue
-            filtered_nodes.append(n)
-        if not filtered_nodes:
-            filtered_nodes = nodetree.nodes
-
         # size limits?
-        self.size_limits = True
-        match props.export_dimensions_enum:
-            case 'CUSTOM':
-                self.max_width  = props.export_dim_custom_width  if props.export_dim_custom_select == 'WIDTH'  else inf
-                self.max_height = props.export_dim_custom_height if props.export_dim_custom_select == 'HEIGHT' else inf
-            case 'PAGE':
-                page_dims = constants.PAGES[props.export_dim_page_type]
-                self.max_width  = (page_dims[1] if props.export_dim_page_landscape else page_dims[0]) * (100 - props.export_dim_page_margins) / 100
-                self.max_height = (page_dims[0] if props.export_dim_page_landscape else page_dims[1]) * (100 - props.export_dim_page_margins) / 100
-            case _:
-                self.size_limits = False
+        self.size_limits = config['size_limits'] is not None
+        if self.size_limits:
+            self.max_width, self.max_height = config['size_limits']
 
         # process Nodes, including nesting into Frames
         top_level = []
         frame_children = {}
 
-        for n in filtered_nodes:
+        for n in snapshot.nodes:
 
             node_object = nodeFactory(n, self.colors, args=widget_args)
 
             if n.parent:
-                ptr = n.parent.as_pointer()
+                ptr = n.parent
                 if not ptr in frame_children:
                     frame_children[ptr] = [node_object]
                 else:
@@ -174,7 +220,7 @@ class Converter():
                 top_level.append(node_object)
 
             if n.mute:
-                self.links.extend([(link.from_socket.as_pointer(), link.to_socket.as_pointer(), True) for link in n.internal_links])
+                self.links.extend([(from_ptr, to_ptr, True) for from_ptr, to_ptr in n.internal_links])
         
         # iterate over Nodes w/o a parent
         for node_object in top_level:
@@ -201,159 +247,59 @@ class Converter():
         # if any frame is actually empty, drop it from further consideration
         self.node_frames = [nf for nf in self.node_frames if not nf.is_empty]
 
-        
-    def style(self) -> ET.Element:
-
-        colors = self.colors
-        
-        style_elem = ET.Element('style')
+        # culled by the size Nodes are drawn at, which is only known once they are laid out
+        if rect is not None:
+            self.cull(rect)
 
-        style_elem.text = '\n\t\t\t'.join([
+        # short ids of minified output
+        self.id_prefixes = [minify.shortPrefix(i) if self.minify else None for i in range(len(self.nodes))]
 
-            "",
 
-            # texts
-            "text { font-family: sans-serif, arial; font-size: 10px; fill: "+colors['text_base']+" }",
-            "text { font-family: sans-serif, arial; font-size: 10px; fill: "+colors['text_base']+" }",
-            ".string text { fill: "+colors['text_string']+" }",
-            ".bool_true  text { fill: "+colors['text_boolean_true'] +" }",
-            ".bool_false text { fill: "+colors['text_boolean_false']+" }",
-            ".dropdown text { fill: "+colors['text_dropdown']+" }",
-            ".value text { fill: "+colors['text_slider']+" }",
+    def cull(self, rect) -> None:
+        """Keeps only the Nodes and Frames intersecting a rectangle (min_x, min_y, max_x, max_y in view space), unless none do."""
 
-            # corners
-            ".corner_l { rx:" + colors['round_l'] + " }",
-            ".corner_s { rx:" + colors['round_s'] + " }",
+        nodes = spatial.buildNodeIndex(self.nodes).query(rect)
+        if not nodes: return
 
-            # generic
-            "rect { stroke-width:"+str(colors['outline_thickness'])+";stroke:"+colors['outline_color']+" }",
-            ".nodeframe { fill:"+colors['color_base']+" } ",
-            ".marker { stroke-width: "+str(constants.MARKER_LINE)+"px; stroke: black}",
-            ".arrow { stroke-width: 1; stroke: white; fill:none}",
-            
-            # booleans
-            ".checkmark { stroke:"+colors['color_checkmark']+" } ",
-            ".bool_false {fill:"+colors['color_bool_false']+"}",
-            ".bool_true  {fill:"+colors['color_bool_true'] +"}",
+        self.nodes = nodes
+        self.node_frames = [nf for nf in self.node_frames if spatial.intersects(spatial.nodeBounds(nf), rect)]
 
-            # values
-            ".value_bar {fill:"+colors['color_value_field']+"}",
-            ".progress_bar {fill:"+colors['color_value_progress']+"}",
+        # links to culled Nodes are dropped
+        self.anchor_refs = {}
+        for node_object in self.nodes:
+            self.anchor_refs.update(node_object.getAnchors())
 
-            # strings
-            ".string { fill:"+colors['color_string_field']+"}",
 
-            # dropdowns
-            ".dropdown { fill:"+colors['color_dropdown']+"}",
+    def applyState(self) -> None:
+        """Sets the module-level state read while rendering (widget settings, number format and color space) to this Renderer's.
 
-            # axes
-            ".axis_x {stroke:"+colors['color_axis_x']+"}",
-            ".axis_y {stroke:"+colors['color_axis_y']+"}",
-            ".axis_z {stroke:"+colors['color_axis_z']+"}",
-            ".axis_w {"+"stroke:black"+"}",
+        Called before rendering, as other Renderers may have been created since."""
 
-            # sockets
-            *([
-                ".marker ."+name.lower()+" { fill: "+colors['socket_color_'+name.lower()]+" }" for name in constants.SOCKET_COLORS.keys()
-            ]),
+        widgets.PROPERTIES = self.render_state.widget_args
+        methods.NUMBER_FORMAT = self.render_state.number_format
+        colorspace.COLOR_SPACE = self.render_state.color_space
 
-            # background
-            ".bg { stroke-width: 0; fill:"+colors['color_background']+"}",
+        
+    def style(self) -> ET.Element:
 
-            ""
-        ])
+        style_elem = ET.Element('style')
+        style_elem.text = self.render_state.css
 
         return style_elem
 
 
-
     def makeDefs(self) -> ET.Element:
 
         defs = ET.Element('defs')
 
         defs.append(self.style())
 
-        # add symbols
-
-        ## markers
-        for sym_name, (elem_name, elem_attrs) in MARKER_DEFS.items():
-            symbol = ET.SubElement(defs, 'symbol', id='marker_'+sym_name)
-            ET.SubElement(symbol, elem_name, attrib=elem_attrs)
-
-        ## arrows
-        for sym_name, (elem_name, elem_attrs) in ARROW_DEFS.items():
-            symbol = ET.SubElement(defs, 'symbol', id=sym_name+'_arrow')
-            arrow = ET.SubElement(symbol, elem_name, attrib=elem_attrs)
-
-        ## color wheel
-        if 'COLOR_PICKER' in widgets.FLAGS:
-            color_wheel = ET.SubElement(defs, 'symbol', id='color_wheel')
-            ### add 'cloud' over gradient
-            cloud_lin = ET.SubElement(color_wheel, 'linearGradient', id='cloud_gradient_linear')
-            ET.SubElement(cloud_lin, 'stop', attrib={'offset':   '0', 'stop-opacity':'1'  , 'stop-color':'white'})
-            ET.SubElement(cloud_lin, 'stop', attrib={'offset': '0.6', 'stop-opacity':'0.5', 'stop-color':'white'})
-            ET.SubElement(cloud_lin, 'stop', attrib={'offset': '1.0', 'stop-opacity':'0'  , 'stop-color':'white'})
-            cloud = ET.SubElement(color_wheel, 'radialGradient', attrib={
-                'id':'cloud_gradient',
-                'xlink:href':'#cloud_gradient_linear',
-                'cx':'0',
-                'cy':'0',
-                'fx':'0',
-                'fy':'0',
-                'r':'50',
-                'gradientUnits':'userSpaceOnUse'
-            })
-            radius=50
-            grp = ET.SubElement(color_wheel, 'g', transform=f'translate({radius},{radius})')
-            steps=2*self.quality
-            def angleToCoords(angle):
-                return radius*cos(angle), radius*sin(angle)
-            for i in range(steps):
-                angle_start = i*2*pi/steps
-                angle_end = (i+1)*2*pi/steps
-                point1_x, point1_y = angleToCoords(angle_start)
-                point2_x, point2_y = angleToCoords(angle_end)
-                color = methods.socketColorToSVGColor(hsv_to_rgb((0.75 + i/steps), 1.0, 1.0))
-                fill = color
-                if self.use_gradient:
-                    next_color = methods.socketColorToSVGColor(hsv_to_rgb((0.75 + (i+1)/steps), 1.0, 1.0))
-                    grad = ET.SubElement(grp, 'linearGradient', id=f'color_wheel_grad_{i}', gradientUnits='userSpaceOnUse', x1=str(point1_x), x2=str(point2_x), y1=str(point1_y), y2=str(point2_y))
-                    ET.SubElement(grad, 'stop', attrib={'offset':'0%', 'stop-color':color})
-                    ET.SubElement(grad, 'stop', attrib={'offset':'100%', 'stop-color':next_color})
-                    fill = f'url(#color_wheel_grad_{i})'
-                ET.SubElement(grp, 'polygon', points=f"0 0 {point1_x} {point1_y} {point2_x} {point2_y}", style=f"fill:{fill}; stroke:none")
-            ET.SubElement(grp, 'circle', cx='0', cy='0', r=str(radius), fill='url(#cloud_gradient)')
-
-        ## hue correct gradient
-        if 'HUE_GRADIENT' in widgets.FLAGS:
-            grad = ET.SubElement(defs, 'linearGradient', id='hc_grad', x1='0', x2='1', y1='0', y2='0')
-            for i in range(7):
-                prog = i/6.0
-                ET.SubElement(grad, 'stop', attrib={'offset':  str(prog), 'stop-color':methods.socketColorToSVGColor(hsv_to_rgb(prog, 1.0, 1.0))})
-
+        # symbols, gradients and further CSS rules are only defined if used, after all elements
 
         return defs
 
 
-    def convert(self) -> ET.ElementTree:
-        
-        svg = ET.Element('svg', attrib={
-            'version':'1.1',
-            'xmlns':'http://www.w3.org/2000/svg',
-            'xmlns:xlink':'http://www.w3.org/1999/xlink'
-        })
-
-        svg.append(self.makeDefs())
-
-        # add background background color
-        bg = None
-        if not self.transparent_bg:
-            bg = ET.SubElement(svg, 'rect', attrib={'width': '100%', 'height': '100%', 'class': 'bg'})
-
-        # add node frames to final SVG
-        for frame in self.node_frames:
-            out = frame.svg()
-            if out: svg.append(out)
+    def computeViewBox(self) -> None:
 
         n = (self.nodes+self.node_frames)[0]
         self.vb_min_x = n.x
@@ -368,44 +314,24 @@ class Converter():
             self.vb_max_x = max(self.vb_max_x, n.x+n.w)
             self.vb_max_y = max(self.vb_max_y, n.y+n.h)
 
-
         # update viewbox based on rendered links
-        vb_w = self.vb_max_x-self.vb_min_x
-        vb_h = self.vb_max_y-self.vb_min_y
-
-        # add links to final SVG
-        fac = self.curving/10.0
-        for link in self.links:
-            
-            if not link[0] in self.anchor_refs or not link[1] in self.anchor_refs: continue
-            from_x, from_y, from_anchor_object = self.anchor_refs[link[0]]
-            to_x, to_y, _ = self.anchor_refs[link[1]]
-            is_muted = link[2]
+        self.visible_links = list(self.visibleLinks())
+        self.link_geometry = links.LinkGeometry([link[:4] for link in self.visible_links], self.curving)
 
-            opacity = '1' if not is_muted else '0.2'
+        if (link_bounds := self.link_geometry.bounds()) is not None:
+            self.vb_min_x = min(self.vb_min_x, link_bounds[0])
+            self.vb_min_y = min(self.vb_min_y, link_bounds[1])
+            self.vb_max_x = max(self.vb_max_x, link_bounds[2])
+            self.vb_max_y = max(self.vb_max_y, link_bounds[3])
 
-            color1 = self.colors['socket_color_'+from_anchor_object.type]
-
-            diff_x = abs(to_x - from_x)
-            control_x1 = from_x + fac*diff_x
-            control_x2 = to_x - fac*diff_x
-
-            ET.SubElement(svg, 'path', d=f"M {from_x},{from_y} C {control_x1},{from_y} {control_x2},{to_y} {to_x},{to_y}",
-                            style=f"stroke:#000000;stroke-width:4;fill:none;opacity:{opacity}")
-            ET.SubElement(svg, 'path', d=f"M {from_x},{from_y} C {control_x1},{from_y} {control_x2},{to_y} {to_x},{to_y}",
-                            style=f"stroke:{color1};stroke-width:2;fill:none;opacity:{opacity}")
-            
-            if self.curving > 0 and control_x1 > control_x2:
-                x1, x2 = methods.getBezierExtrema(from_x, control_x1, control_x2, to_x)
-                self.vb_min_x = min(self.vb_min_x, min(x1, x2))
-                vb_w = max(vb_w, max(x1-self.vb_min_x, x2-self.vb_min_x))
+        vb_w = self.vb_max_x-self.vb_min_x
+        vb_h = self.vb_max_y-self.vb_min_y
 
         self.vb_min_x -= constants.VIEWBOX_PADDING
         self.vb_min_y -= constants.VIEWBOX_PADDING
         vb_w += 2*constants.VIEWBOX_PADDING
         vb_h += 2*constants.VIEWBOX_PADDING
 
-
         # constrain size and update properties
         svg_w = vb_w
         svg_h = vb_h
@@ -414,31 +340,360 @@ class Converter():
             svg_w = vb_w * ratio
             svg_h = vb_h * ratio
 
-        svg.set('width',  str(svg_w))
-        svg.set('height', str(svg_h))
-        svg.set('viewBox', ' '.join([str(f) for f in [
+        self.vb_w, self.vb_h = vb_w, vb_h
+        self.svg_w, self.svg_h = svg_w, svg_h
+
+
+    def svgRoot(self) -> ET.Element:
+
+        svg = ET.Element('svg', attrib={
+            'version':'1.1',
+            'xmlns':'http://www.w3.org/2000/svg',
+            'xmlns:xlink':'http://www.w3.org/1999/xlink'
+        })
+
+        svg.set('width',  methods.svgNumber(self.svg_w))
+        svg.set('height', methods.svgNumber(self.svg_h))
+        svg.set('viewBox', ' '.join([methods.svgNumber(f) for f in [
             self.vb_min_x,
             self.vb_min_y,
-            vb_w,
-            vb_h
+            self.vb_w,
+            self.vb_h
         ]]))
 
+        return svg
+
+
+    def visibleLinks(self):
+        """Yields the endpoints, color and muted state of every link between exported sockets."""
+
+        for link in self.links:
+            
+            if not link[0] in self.anchor_refs or not link[1] in self.anchor_refs: continue
+            from_x, from_y, from_anchor_object = self.anchor_refs[link[0]]
+            to_x, to_y, _ = self.anchor_refs[link[1]]
+            is_muted = link[2]
+
+            color1 = self.colors['socket_color_'+from_anchor_object.type]
+
+            yield from_x, from_y, to_x, to_y, color1, is_muted
+
+
+    def linkPaths(self, d, color1, is_muted, registry=None) -> tuple[ET.Element, ET.Element]:
+        """Returns the outline and the path of a link. Style classes are requested from registry (defs_registry unless given)."""
+
+        opacity = '1' if not is_muted else '0.2'
+
+        paths = (
+            ET.Element('path', d=d, style=f"stroke:#000000;stroke-width:4;fill:none;opacity:{opacity}"),
+            ET.Element('path', d=d, style=f"stroke:{color1};stroke-width:2;fill:none;opacity:{opacity}")
+        )
+        if self.style_classes:
+            for path in paths:
+                defs.compileStyles(path, self.defs_registry if registry is None else registry)
+        return paths
+
+
+    def linkGroups(self) -> dict[tuple[str, bool], list[int]]:
+        """Returns indices of visible links grouped by their color and muted state, in order of appearance."""
+
+        groups = {}
+        for i, link in enumerate(self.visible_links):
+            groups.setdefault(link[4:], []).append(i)
+        return groups
+
+
+    def linkElements(self):
+        """Yields the paths of all links. Requires computeViewBox() to have been called."""
+
+        if self.merge_links:
+            for (color1, is_muted), indices in self.linkGroups().items():
+                yield from self.linkPaths(self.link_geometry.mergedPathData(indices), color1, is_muted)
+            return
+
+        # add links to final SVG
+        for link, d in self.orderedLinks():
+            yield from self.linkPaths(d, *link[4:])
+
+
+    def orderedLinks(self):
+        """Yields visible links with their path data, grouped by color and muted state if set to group elements."""
+
+        path_data = self.link_geometry.pathData()
+        if not self.group_elements:
+            yield from zip(self.visible_links, path_data)
+            return
+
+        for indices in self.linkGroups().values():
+            for i in indices:
+                yield self.visible_links[i], path_data[i]
+
+
+    def headElements(self):
+        """Yields the top-level elements preceding the links. Requires computeViewBox() to have been called."""
+
+        # resources of elements outside Nodes go straight into the output
+        defs.RESOURCES = self.defs_registry
+
+        yield self.makeDefs()
+
+        # add background background color
         if not self.transparent_bg:
-            bg.set('x', str(self.vb_min_x))        
-            bg.set('y', str(self.vb_min_y))        
+            bg = ET.Element('rect', attrib={'width': '100%', 'height': '100%', 'class': 'bg'})
+            bg.set('x', methods.svgNumber(self.vb_min_x))
+            bg.set('y', methods.svgNumber(self.vb_min_y))
+            self.defs_registry.requestClasses(bg)
+            yield bg
+
+        # add node frames to final SVG
+        for frame in self.node_frames:
+            out = frame.svg()
+            if out is None: continue
+            self.defs_registry.requestClasses(out)
+            if self.style_classes:
+                defs.compileStyles(out, self.defs_registry)
+            yield out
+
+
+    def nodeElements(self):
 
         # add nodes to final SVG
-        for n in self.nodes:
-            out = n.svg(self.colors['header_opacity'], use_gradient=self.use_gradient)
-            if out: svg.append(out)
+        for n, id_prefix in zip(self.nodes, self.id_prefixes):
+            out, resources = parallel.renderElement(n, self.colors['header_opacity'], self.use_gradient, id_prefix, self.keep_metadata)
+            self.defs_registry.update(resources)
+            if out is not None: yield out
+
+
+    def idMap(self) -> dict[str, str]:
+        """Returns the ids of Nodes in minified output mapped to their ids in regular output."""
+
+        return {id_prefix: n.id for n, id_prefix in zip(self.nodes, self.id_prefixes) if id_prefix is not None}
+
+
+    def anchorElements(self):
+
+        anchors = self.anchor_refs.values()
+        if self.group_elements:
+            # equal markers next to each other compress better
+            anchors = sorted(anchors, key=lambda anchor: (anchor[2].shape, anchor[2].has_dot, anchor[2].type))
+
+        # resources of elements outside Nodes go straight into the output
+        defs.RESOURCES = self.defs_registry
+
+        if self.merge_markers:
+            yield from self.mergedAnchorElements(anchors)
+            return
 
         # add anchors to final SVG
-        for x, y, anchor in self.anchor_refs.values():
-            out = anchor.svg(x=str(x-constants.MARKER_BOX_HALF), y=str(y-constants.MARKER_BOX_HALF))
-            if not out: continue
-            svg.append(out)
+        for x, y, anchor in anchors:
+            out = anchor.svg(x=methods.svgNumber(x-constants.MARKER_BOX_HALF), y=methods.svgNumber(y-constants.MARKER_BOX_HALF))
+            if out is None: continue
+            self.defs_registry.requestClasses(out)
+            yield out
+
+
+    def mergedAnchorElements(self, anchors):
+        """Yields all markers as one group with a path for each shape and socket type, and one for all dots."""
+
+        shapes = {}
+        dots = []
+        for x, y, anchor in anchors:
+            if not anchor.render: continue
+            shapes.setdefault((anchor.shape, anchor.type), []).append((x, y))
+            if anchor.has_dot: dots.append((x, y))
+
+        if not shapes: return
+
+        group = ET.Element('g', attrib={'class': 'marker'})
+        for (shape, socket_type), centers in shapes.items():
+            ET.SubElement(group, 'path', attrib={'d': marker.mergedPathData(shape, centers), 'class': socket_type})
+        # above all markers, like each dot above its marker
+        if dots:
+            ET.SubElement(group, 'path', attrib={'d': marker.mergedPathData('dot', dots), 'stroke': 'none'})
+
+        self.defs_registry.requestClasses(group)
+        yield group
+
+
+    def elements(self):
+        """Yields the top-level elements of the output one by one, in document order.
+
+        Requires computeViewBox() to have been called."""
+
+        self.applyState()
+        self.defs_registry = defs.DefsRegistry()
+
+        yield from self.headElements()
+        yield from self.linkElements()
+        yield from self.nodeElements()
+        yield from self.anchorElements()
+
+        # resources used by the elements, with the CSS rules of their classes
+        if (trailing_defs := self.defs_registry.svg(self.render_state.css_rules)) is not None:
+            yield trailing_defs
+
+
+    def linkFragments(self, indent=True, cache=None):
+        """Yields serialized links, reusing those cached from previous exports."""
+
+        if self.merge_links:
+            for (color1, is_muted), indices in self.linkGroups().items():
+                key = ('link_group', self.curving, indent, self.number_key, self.style_classes, color1, is_muted, methods.stateHash([self.visible_links[i][:4] for i in indices]))
+                fragment = cache.get(key) if cache is not None else None
+
+                if fragment is None:
+                    d = self.link_geometry.mergedPathData(indices)
+                    registry = defs.DefsRegistry()
+                    fragment = tuple(writer.serialize(elem, indent=indent) for elem in self.linkPaths(d, color1, is_muted, registry)), registry.items()
+                    if cache is not None: cache.put(key, fragment)
+
+                self.defs_registry.update(fragment[1])
+                yield from fragment[0]
+            return
+
+        for link, d in self.orderedLinks():
+
+            key = ('link', self.curving, indent, self.number_key, self.style_classes, *link)
+            fragment = cache.get(key) if cache is not None else None
+
+            if fragment is None:
+                registry = defs.DefsRegistry()
+                fragment = tuple(writer.serialize(elem, indent=indent) for elem in self.linkPaths(d, *link[4:], registry)), registry.items()
+                if cache is not None: cache.put(key, fragment)
+
+            self.defs_registry.update(fragment[1])
+            yield from fragment[0]
+
+
+    def nodeFragments(self, indent=True, workers=1, cache=None, pool=None):
+        """Yields serialized Nodes in order. Nodes found in the cache are copied, only the rest is rendered.
+
+        Resources used by the Nodes are collected in defs_registry."""
+
+        keys = [None]*len(self.nodes)
+        fragments = [None]*len(self.nodes)
+        if cache is not None:
+            config_key = methods.stateHash(self.render_state.key, indent)
+            keys = [methods.stateHash(config_key, id_prefix, n.state()) for n, id_prefix in zip(self.nodes, self.id_prefixes)]
+            fragments = [cache.get(key) for key in keys]
+
+        dirty = [(n, id_prefix) for n, id_prefix, fragment in zip(self.nodes, self.id_prefixes, fragments) if fragment is None]
+        if workers > 1:
+            rendered = parallel.renderFragments([n for n, _ in dirty], self.colors['header_opacity'], use_gradient=self.use_gradient, indent=indent,
+                                                id_prefixes=[id_prefix for _, id_prefix in dirty], keep_metadata=self.keep_metadata, workers=workers, pool=pool)
+        else:
+            rendered = (parallel.renderFragment(n, self.colors['header_opacity'], use_gradient=self.use_gradient, indent=indent,
+                                                id_prefix=id_prefix, keep_metadata=self.keep_metadata) for n, id_prefix in dirty)
+
+        try:
+            for key, fragment in zip(keys, fragments):
+                if fragment is None:
+                    data, resources = next(rendered)
+                    fragment = ((data,) if data is not None else ()), resources
+                    if cache is not None: cache.put(key, fragment)
+                self.defs_registry.update(fragment[1])
+                yield from fragment[0]
+        finally:
+            # shuts a process pool of this export down
+            rendered.close()
+
+
+    def convert(self) -> ET.ElementTree:
+
+        self.applyState()
+        self.computeViewBox()
+
+        svg = self.svgRoot()
+        svg.extend(self.elements())
 
         tree = ET.ElementTree(svg)
-        ET.indent(tree)
+        if not self.minify:
+            ET.indent(tree)
 
         return tree
+
+
+    def write(self, f, indent=True, workers=1, cache=None, pool=None) -> None:
+        """Streams the output into a binary file handle without building the whole tree.
+
+        With more than one worker, Nodes are rendered in a pool of processes, which may be shared by several
+        exports (see parallel.renderPool()). With a FragmentCache, links and Nodes unchanged since a previous
+        export are copied from it instead of being rendered.
+        Output is identical to writing the tree returned by convert() (which is indented unless minified)."""
+
+        self.applyState()
+        self.computeViewBox()
+
+        if cache is not None:
+            cache.resetStats()
+
+        self.defs_registry = defs.DefsRegistry()
+
+        with writer.SVGStreamWriter(f, self.svgRoot(), indent=indent) as stream:
+
+            for elem in self.headElements():
+                stream.write(elem)
+
+            for data in self.linkFragments(indent=indent, cache=cache):
+                stream.writeBytes(data)
+
+            for data in self.nodeFragments(indent=indent, workers=workers, cache=cache, pool=pool):
+                stream.writeBytes(data)
+
+            for elem in self.anchorElements():
+                stream.write(elem)
+
+            # resources used by the elements, with the CSS rules of their classes
+            if (trailing_defs := self.defs_registry.svg(self.render_state.css_rules)) is not None:
+                stream.write(trailing_defs)
+
+
+    def writeDocument(self, f, workers=1, cache=None, pool=None) -> None:
+        """Writes the whole SVG document, including the XML declaration and doctype unless minified."""
+
+        if not self.minify:
+            f.write(writer.XML_HEADER)
+            f.write(writer.XML_DOCTYPE)
+
+        self.write(f, indent=not self.minify, workers=workers, cache=cache, pool=pool)
+
+
+class Converter(Renderer):
+    """Renders a node tree using the add-on's preferences.
+
+    Without an explicit node tree, the tree of the active editor is rendered, filtered by selection
+    and viewport as set in the preferences. An explicit tree is rendered whole and needs no editor,
+    so it works in background mode as well."""
+
+    def __init__(self, context, node_tree=None) -> None:
+
+        config = ExportConfig.fromContext(context)
+
+        # colors of widgets are converted while taking the snapshot
+        colorspace.COLOR_SPACE = colorspace.getColorSpace(config['display_device'])
+
+        rect = None
+        if node_tree is None:
+            node_tree = context.space_data.node_tree
+            nodes = self.filterNodes(context, node_tree)
+            if context.preferences.addons[__package__].preferences.export_viewport_only:
+                rect = spatial.viewRect(context.region)
+        else:
+            nodes = node_tree.nodes
+
+        tree_snapshot = snapshot.extractTree(node_tree, args={'quality': config['fidelity']}, nodes=nodes)
+
+        super().__init__(tree_snapshot, config, rect=rect)
+
+    def filterNodes(self, context, nodetree) -> list:
+
+        # obtain properties
+        props = context.preferences.addons[__package__].preferences
+
+        filtered_nodes = list(nodetree.nodes)
+        if props.export_selected_only:
+            filtered_nodes = [n for n in filtered_nodes if n.select]
+        if not filtered_nodes:
+            filtered_nodes = nodetree.nodes
+
+        return filtered_nodes
@@ -0,0 +1,299 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+# Evaluation of curve mappings without Blender, following curvemap_make_table() and
+# BKE_curvemapping_evaluateF() in source/blender/blenkernel/intern/colortools.cc (Blender's
+# source code, distributed under the same license as this add-on). Like Blender, each curve
+# is sampled into a table once, from which all samples are interpolated, instead of one
+# CurveMapping.evaluate() call through RNA for each of them.
+
+from math import hypot, isclose
+
+# segments of each Bézier part, and intervals of the table
+CM_RESOL = 32
+CM_TABLE = 256
+
+FLT_EPSILON = 1.1920929e-07
+
+# largest difference from CurveMapping.evaluate(), which computes in single precision
+TOLERANCE = 1e-4
+
+# number of samples of each curve compared with CurveMapping.evaluate()
+SPOT_CHECKS = 3
+
+# positions within intervals checked against the line connecting their ends when refining samples
+REFINE_CHECKS = (0.25, 0.5, 0.75)
+
+
+def calcHandles(bezier: list[list[list[float]]], handle_types: list[str]) -> None:
+    """Sets handles of Bézier points (handle, point, handle) by their types, see calchandle_curvemap()."""
+
+    count = len(bezier)
+    for a, handle_type in enumerate(handle_types):
+        h1, p2, h2 = bezier[a]
+        prev = bezier[a-1][1] if a > 0 else None
+        next = bezier[a+1][1] if a < count-1 else None
+
+        # missing neighbors are mirrored
+        p1 = prev if prev is not None else (2.0*p2[0] - next[0], 2.0*p2[1] - next[1])
+        p3 = next if next is not None else (2.0*p2[0] - p1[0], 2.0*p2[1] - p1[1])
+
+        dvec_a = (p2[0] - p1[0], p2[1] - p1[1])
+        dvec_b = (p3[0] - p2[0], p3[1] - p2[1])
+        len_a = hypot(*dvec_a) or 1.0
+        len_b = hypot(*dvec_b) or 1.0
+
+        if handle_type in ('AUTO', 'AUTO_CLAMPED'):
+            tvec = (dvec_b[0]/len_b + dvec_a[0]/len_a, dvec_b[1]/len_b + dvec_a[1]/len_a)
+            length = hypot(*tvec) * 2.5614
+            if length != 0.0:
+                h1[:] = p2[0] - tvec[0]*len_a/length, p2[1] - tvec[1]*len_a/length
+                h2[:] = p2[0] + tvec[0]*len_b/length, p2[1] + tvec[1]*len_b/length
+
+                if handle_type == 'AUTO_CLAMPED' and prev is not None and next is not None:
+                    ydiff1 = prev[1] - p2[1]
+                    ydiff2 = next[1] - p2[1]
+                    if (ydiff1 <= 0.0 and ydiff2 <= 0.0) or (ydiff1 >= 0.0 and ydiff2 >= 0.0):
+                        # horizontal at extrema
+                        h1[1] = h2[1] = p2[1]
+                    elif ydiff1 <= 0.0:
+                        # not beyond the neighbors
+                        h1[1] = max(h1[1], prev[1])
+                        h2[1] = min(h2[1], next[1])
+                    else:
+                        h1[1] = min(h1[1], prev[1])
+                        h2[1] = max(h2[1], next[1])
+
+        elif handle_type == 'VECTOR':
+            h1[:] = p2[0] - dvec_a[0]/3.0, p2[1] - dvec_a[1]/3.0
+            h2[:] = p2[0] + dvec_b[0]/3.0, p2[1] + dvec_b[1]/3.0
+
+def correctEndHandle(point: list[float], handle: list[float], opposite: list[float], towards: list[float], clip_x) -> None:
+    """Points an outer auto handle to the closest handle of the neighbor, keeping its length."""
+
+    hlen = hypot(handle[0] - point[0], handle[1] - point[1])
+    vec = [clip_x(towards[0], point[0]) - point[0], towards[1] - point[1]]
+    nlen = hypot(*vec)
+    if nlen > FLT_EPSILON:
+        vec = [vec[0]*hlen/nlen, vec[1]*hlen/nlen]
+        handle[:] = point[0] + vec[0], point[1] + vec[1]
+        opposite[:] = point[0] - vec[0], point[1] - vec[1]
+
+def correctBezierPart(v1: list[float], v2: list[float], v3: list[float], v4: list[float]) -> None:
+    """Shortens handles exceeding the part's span, so that the curve does not loop back."""
+
+    h1 = (v1[0] - v2[0], v1[1] - v2[1])
+    h2 = (v4[0] - v3[0], v4[1] - v3[1])
+    span = v4[0] - v1[0]
+    len1, len2 = abs(h1[0]), abs(h2[0])
+    if len1 + len2 == 0.0: return
+    if len1 > span:
+        fac = span / len1
+        v2[:] = v1[0] - fac*h1[0], v1[1] - fac*h1[1]
+    if len2 > span:
+        fac = span / len2
+        v3[:] = v4[0] - fac*h2[0], v4[1] - fac*h2[1]
+
+def bezierPart(q0: float, q1: float, q2: float, q3: float) -> list[float]:
+    return [
+        (1-t)**3*q0 + 3*(1-t)**2*t*q1 + 3*(1-t)*t**2*q2 + t**3*q3
+        for t in [i/(CM_RESOL-1) for i in range(CM_RESOL)]
+    ]
+
+def unit(x: float, y: float) -> tuple[float, float]:
+    length = hypot(x, y) or 1.0
+    return x/length, y/length
+
+
+class CurveMap():
+    """Copy of a curve of a curve mapping, sampled into a table as in Blender."""
+
+    def __init__(self, points: list[tuple[float, float, str]], clip_min_x=0.0, clip_max_x=1.0, extrapolate=True) -> None:
+        self.points = points
+        self.extrapolate = extrapolate
+        self.makeTable(clip_min_x, clip_max_x)
+
+    def makeTable(self, clip_min_x: float, clip_max_x: float) -> None:
+
+        points = self.points
+        bezier = [[[x, y], [x, y], [x, y]] for x, y, _ in points]
+        calcHandles(bezier, [handle_type for _, _, handle_type in points])
+
+        # outer handles point to the closest handle instead of the next point
+        if len(points) > 2:
+            if points[0][2] == 'AUTO':
+                correctEndHandle(bezier[0][1], bezier[0][2], bezier[0][0], bezier[1][0], max)
+            if points[-1][2] == 'AUTO':
+                correctEndHandle(bezier[-1][1], bezier[-1][0], bezier[-1][2], bezier[-2][2], min)
+
+        curve_points = []
+        for (_, v1, v2), (v3, v4, _) in zip(bezier[:-1], bezier[1:]):
+            correctBezierPart(v1, v2, v3, v4)
+            curve_points.extend(zip(
+                bezierPart(v1[0], v2[0], v3[0], v4[0]),
+                bezierPart(v1[1], v2[1], v3[1], v4[1])
+            ))
+
+        # directions of the outer handles, for extrapolation
+        self.ext_in = unit(bezier[0][0][0] - bezier[0][1][0], bezier[0][0][1] - bezier[0][1][1])
+        self.ext_out = unit(bezier[-1][1][0] - bezier[-1][2][0], bezier[-1][1][1] - bezier[-1][2][1])
+
+        self.min_table = min(clip_min_x, *[x for x, _, _ in points])
+        max_table = max(clip_max_x, *[x for x, _, _ in points])
+        step = (max_table - self.min_table) / CM_TABLE
+        self.range = 1.0 / step
+
+        # the curve at equal distances
+        first, last = curve_points[0], curve_points[-1]
+        self.table = []
+        i = 0
+        for a in range(CM_TABLE+1):
+            x = self.min_table + step*a
+            while x >= curve_points[i][0] and i != len(curve_points)-1:
+                i += 1
+            if i == 0 or (i == len(curve_points)-1 and x >= curve_points[i][0]):
+                if abs(x - curve_points[i][0]) <= 1e-6:
+                    y = curve_points[i][1]
+                else:
+                    y = self.extend(x, first, last)
+            else:
+                (x0, y0), (x1, y1) = curve_points[i-1], curve_points[i]
+                fac = (x1 - x) / (x1 - x0) if x1 - x0 > FLT_EPSILON else 0.0
+                y = fac*y0 + (1.0 - fac)*y1
+            self.table.append((x, y))
+
+    def extend(self, x: float, first: tuple[float, float], last: tuple[float, float]) -> float:
+        """Returns the value outside of the curve, horizontal or extrapolated along the outer handles."""
+
+        if x <= first[0]:
+            if not self.extrapolate: return first[1]
+            if self.ext_in[0] == 0.0: return first[1] + self.ext_in[1]*10000.0
+            return first[1] + self.ext_in[1]*(x - first[0])/self.ext_in[0]
+        if x >= last[0]:
+            if not self.extrapolate: return last[1]
+            if self.ext_out[0] == 0.0: return last[1] - self.ext_out[1]*10000.0
+            return last[1] + self.ext_out[1]*(x - last[0])/self.ext_out[0]
+        return 0.0
+
+    def evaluate(self, xs: list[float]) -> list[float]:
+
+        table = self.table
+        ys = []
+        for x in xs:
+            # index in the table
+            fi = (x - self.min_table) * self.range
+            if fi < 0.0 or fi > CM_TABLE:
+                ys.append(self.extend(x, table[0], table[CM_TABLE]))
+                continue
+            i = int(fi)
+            if i >= CM_TABLE:
+                ys.append(table[CM_TABLE][1])
+                continue
+            fi -= i
+            ys.append((1.0 - fi)*table[i][1] + fi*table[i+1][1])
+        return ys
+
+
+class CurveMapping():
+    """Copy of a curve mapping's curves and clipping, evaluated as in Blender.
+
+    Clipping of values uses the clipping rectangle, which Blender's current view rectangle equals unless zoomed."""
+
+    def __init__(self, curves: list[list[tuple[float, float, str]]], clip_rect=(0.0, 0.0, 1.0, 1.0), use_clip=True, extrapolate=True) -> None:
+        self.clip_min_x, self.clip_min_y, self.clip_max_x, self.clip_max_y = clip_rect
+        self.use_clip = use_clip
+        self.curves = [CurveMap(points, self.clip_min_x, self.clip_max_x, extrapolate) for points in curves]
+
+    @classmethod
+    def fromMapping(cls, mapping: 'bpy.types.CurveMapping') -> 'CurveMapping':
+        """Reads the control points of all curves once."""
+
+        return cls(
+            [[(*point.location, point.handle_type) for point in curve.points] for curve in mapping.curves],
+            (mapping.clip_min_x, mapping.clip_min_y, mapping.clip_max_x, mapping.clip_max_y),
+            mapping.use_clip,
+            mapping.extend == 'EXTRAPOLATED'
+        )
+
+    def evaluate(self, index: int, xs: list[float]) -> list[float]:
+        """Returns values of a curve at all positions at once."""
+
+        ys = self.curves[index].evaluate(xs)
+        if self.use_clip:
+            ys = [min(max(y, self.clip_min_y), self.clip_max_y) for y in ys]
+        return ys
+
+
+def deviation(value, expected) -> float:
+    """Returns the largest difference of a number, or of the components of a tuple, from the expected one."""
+
+    if isinstance(value, tuple):
+        return max(abs(a - b) for a, b in zip(value, expected))
+    return abs(value - expected)
+
+def refineSamples(evaluate, points: list[tuple[float, float]], tolerance: float, max_depth: int, steps=False) -> list[tuple[float, float]]:
+    """Adds samples between points sorted by x, where the curve deviates from their connecting line by more than tolerance.
+    With steps, it is compared with the value at the start of each interval instead, including at its end.
+
+    Values are numbers or tuples of them. Intervals are quartered up to max_depth times, with the quarter points
+    of each round evaluated at once, so that bends crossing the connecting line at the midpoint are found too."""
+
+    def expected(start, end, fac):
+        if steps:
+            return start
+        if isinstance(start, tuple):
+            return tuple((1.0-fac)*a + fac*b for a, b in zip(start, end))
+        return (1.0-fac)*start + fac*end
+
+    open_intervals = [True] * (len(points)-1)
+    for _ in range(max_depth):
+        candidates = [i for i, is_open in enumerate(open_intervals) if is_open]
+        if not candidates: break
+        xs = [points[i][0] + fac*(points[i+1][0]-points[i][0]) for i in candidates for fac in REFINE_CHECKS]
+        ys = evaluate(xs)
+        checks = len(REFINE_CHECKS)
+        samples = {i: list(zip(xs[k*checks:(k+1)*checks], ys[k*checks:(k+1)*checks])) for k, i in enumerate(candidates)}
+
+        refined, refined_open = [points[0]], []
+        for i, (start, end) in enumerate(zip(points[:-1], points[1:])):
+            inner = samples.get(i)
+            if inner is not None and end[0] > start[0] and any(
+                deviation(y, expected(start[1], end[1], fac)) > tolerance
+                for fac, (_, y) in zip((*REFINE_CHECKS, 1.0), [*inner, end] if steps else inner)
+            ):
+                refined.extend([*inner, end])
+                refined_open.extend([True] * (checks+1))
+            else:
+                refined.append(end)
+                refined_open.append(False)
+        points, open_intervals = refined, refined_open
+
+    return points
+
+
+def spotCheck(mapping: 'bpy.types.CurveMapping', index: int, xs: list[float], ys: list[float]) -> bool:
+    """Compares a few evaluated values (evenly picked) with CurveMapping.evaluate()."""
+
+    curve = mapping.curves[index]
+    step = max(1, len(xs) // SPOT_CHECKS)
+    for i in range(step // 2, len(xs), step):
+        if not isclose(ys[i], mapping.evaluate(curve, xs[i]), rel_tol=TOLERANCE, abs_tol=TOLERANCE):
+            return False
+    return True
@@ -0,0 +1,351 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+
+# Shared definitions (clip paths, gradients, symbols, style classes, ...) requested by elements
+# while they are rendered.
+#
+# Elements only reference a resource by its id, which is derived from its content, so equal
+# resources are defined once for the whole output, in <defs> following all other elements,
+# and only if they are used. Classes of rendered elements are requested as well, so that only
+# CSS rules of used classes are written.
+# Resources are plain tuples (id, kind, args), so they can be cached and sent between processes.
+
+import re
+import hashlib
+import xml.etree.ElementTree as ET
+
+from colorsys import hsv_to_rgb
+from math import sin, cos, pi
+
+from . import constants
+from .methods import socketColorToSVGColor, svgNumber
+from .minify import URL_REFERENCE, HREF_ATTRIBUTES
+
+UNSAFE_ID_CHARACTERS = re.compile(r'[^A-Za-z0-9_]')
+
+# resources whose arguments are too long for an id are named by a digest of them, after a prefix
+DIGEST_KINDS = {
+    'symbol': 'symbol_',
+    'gradient': 'gradient_',
+    # short, as class names are repeated on every styled element
+    'style': 's'
+}
+
+DIGEST_LENGTH = 8
+
+DIGEST_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def digest(args: tuple[str, ...]) -> str:
+    # base 36, so few characters still make collisions improbable
+    value = int.from_bytes(hashlib.sha1('\0'.join(args).encode('utf-8')).digest()[:8], 'big')
+    digits = []
+    for _ in range(DIGEST_LENGTH):
+        value, digit = divmod(value, len(DIGEST_DIGITS))
+        digits.append(DIGEST_DIGITS[digit])
+    return ''.join(digits)
+
+
+def resourceId(kind: str, args: tuple[str, ...]) -> str:
+    if kind in DIGEST_KINDS:
+        return DIGEST_KINDS[kind] + digest(args)
+    # '.' and '-' in numbers are spelled out to keep ids unambiguous
+    return '_'.join([kind, *[UNSAFE_ID_CHARACTERS.sub('_', arg.replace('.', 'p').replace('-', 'm')) for arg in args]])
+
+
+def clipElement(resource_id: str, width: str, height: str, rx: str) -> ET.Element:
+    clip = ET.Element('clipPath', id=resource_id)
+    ET.SubElement(clip, 'rect', attrib={
+        'width': width,
+        'height': height,
+        'rx': rx
+    })
+    return clip
+
+def symbolElement(resource_id: str, content: str) -> ET.Element:
+    # drawn at the position of the <use>, not clipped to its size
+    symbol = ET.Element('symbol', id=resource_id, overflow='visible')
+    symbol.extend(ET.fromstring(f'<g>{content}</g>'))
+    return symbol
+
+MARKER_SHAPES = {
+    'circle':('circle',{
+                            'cx':f'{constants.MARKER_BOX_HALF}',
+                            'cy':f'{constants.MARKER_BOX_HALF}',
+                            'r':f'{constants.MARKER_SIZE/2}',
+                            'class':'marker'
+                            }),
+    'square':('rect',{
+                            'x':'0',
+                            'y':'0',
+                            'width':f'{constants.MARKER_SIZE}',
+                            'height':f'{constants.MARKER_SIZE}',
+                            'class':'marker'
+                            }),
+    'diamond':('polygon',{
+                            'points':f'\
+                            {constants.MARKER_LINE/2} {constants.MARKER_BOX_HALF} \
+                            {constants.MARKER_BOX_HALF} {constants.MARKER_LINE/2} \
+                            {constants.MARKER_SIZE+constants.MARKER_LINE/2} {constants.MARKER_BOX_HALF} \
+                            {constants.MARKER_BOX_HALF} {constants.MARKER_SIZE+constants.MARKER_LINE/2} \
+                            ',
+                            'class':'marker'
+                            }),
+    'dot':('circle',{       
+                            'cx':f'{constants.MARKER_BOX_HALF}',
+                            'cy':f'{constants.MARKER_BOX_HALF}',
+                            'r':f'{constants.MARKER_DOT_RADIUS}',
+                            'class':'marker_dot'
+                            })
+    }
+
+ARROW_DIRECTIONS = {
+    'right':('polyline',{
+        'points': '5 2 8 5 5 8',
+        'class': 'arrow'
+    }),
+    'down':('polyline', {
+        'points': '2 5 5 8 8 5',
+        'class': 'arrow'
+    })
+}
+
+def markerElement(resource_id: str, shape: str) -> ET.Element:
+    symbol = ET.Element('symbol', id=resource_id)
+    elem_name, elem_attrs = MARKER_SHAPES[shape]
+    ET.SubElement(symbol, elem_name, attrib=elem_attrs)
+    return symbol
+
+def arrowElement(resource_id: str, direction: str) -> ET.Element:
+    symbol = ET.Element('symbol', id=resource_id)
+    elem_name, elem_attrs = ARROW_DIRECTIONS[direction]
+    ET.SubElement(symbol, elem_name, attrib=elem_attrs)
+    return symbol
+
+def gradientElement(resource_id: str, *stops: str) -> ET.Element:
+    # stops are pairs of offset and color
+    grad = ET.Element('linearGradient', id=resource_id)
+    for offset, color in zip(stops[::2], stops[1::2]):
+        ET.SubElement(grad, 'stop', attrib={'offset': offset, 'stop-color': color})
+    return grad
+
+def verticalGradientElement(resource_id: str, height: str) -> ET.Element:
+    grad = ET.Element('linearGradient', id=resource_id, x1='0', x2='0', y1='0', y2=height, gradientUnits='userSpaceOnUse')
+    ET.SubElement(grad, 'stop', attrib={'offset':  '0%', 'stop-color':'white'})
+    ET.SubElement(grad, 'stop', attrib={'offset':'100%', 'stop-color':'black'})
+    return grad
+
+def hueGradientElement(resource_id: str) -> ET.Element:
+    grad = ET.Element('linearGradient', id=resource_id, x1='0', x2='1', y1='0', y2='0')
+    for i in range(7):
+        prog = i/6.0
+        ET.SubElement(grad, 'stop', attrib={'offset':  str(prog), 'stop-color':socketColorToSVGColor(hsv_to_rgb(prog, 1.0, 1.0))})
+    return grad
+
+def colorWheelElement(resource_id: str, steps: str, shading: str) -> ET.Element:
+    color_wheel = ET.Element('symbol', id=resource_id)
+    ### add 'cloud' over gradient
+    cloud_lin = ET.SubElement(color_wheel, 'linearGradient', id=resource_id+'_cloud_linear')
+    ET.SubElement(cloud_lin, 'stop', attrib={'offset':   '0', 'stop-opacity':'1'  , 'stop-color':'white'})
+    ET.SubElement(cloud_lin, 'stop', attrib={'offset': '0.6', 'stop-opacity':'0.5', 'stop-color':'white'})
+    ET.SubElement(cloud_lin, 'stop', attrib={'offset': '1.0', 'stop-opacity':'0'  , 'stop-color':'white'})
+    cloud = ET.SubElement(color_wheel, 'radialGradient', attrib={
+        'id':resource_id+'_cloud',
+        'xlink:href':'#'+resource_id+'_cloud_linear',
+        'cx':'0',
+        'cy':'0',
+        'fx':'0',
+        'fy':'0',
+        'r':'50',
+        'gradientUnits':'userSpaceOnUse'
+    })
+    radius=50
+    grp = ET.SubElement(color_wheel, 'g', transform=f'translate({svgNumber(radius)},{svgNumber(radius)})')
+    steps=int(steps)
+    def angleToCoords(angle):
+        return radius*cos(angle), radius*sin(angle)
+    for i in range(steps):
+        angle_start = i*2*pi/steps
+        angle_end = (i+1)*2*pi/steps
+        point1_x, point1_y = angleToCoords(angle_start)
+        point2_x, point2_y = angleToCoords(angle_end)
+        color = socketColorToSVGColor(hsv_to_rgb((0.75 + i/steps), 1.0, 1.0))
+        fill = color
+        if shading == 'smooth':
+            next_color = socketColorToSVGColor(hsv_to_rgb((0.75 + (i+1)/steps), 1.0, 1.0))
+            grad = ET.SubElement(grp, 'linearGradient', id=f'{resource_id}_{i}', gradientUnits='userSpaceOnUse', x1=svgNumber(point1_x), x2=svgNumber(point2_x), y1=svgNumber(point1_y), y2=svgNumber(point2_y))
+            ET.SubElement(grad, 'stop', attrib={'offset':'0%', 'stop-color':color})
+            ET.SubElement(grad, 'stop', attrib={'offset':'100%', 'stop-color':next_color})
+            fill = f'url(#{resource_id}_{i})'
+        ET.SubElement(grp, 'polygon', points=f"0 0 {svgNumber(point1_x)} {svgNumber(point1_y)} {svgNumber(point2_x)} {svgNumber(point2_y)}", style=f"fill:{fill}; stroke:none")
+    ET.SubElement(grp, 'circle', cx='0', cy='0', r=svgNumber(radius), fill=f'url(#{resource_id}_cloud)')
+    return color_wheel
+
+RESOURCE_ELEMENTS = {
+    'clip': clipElement,
+    'symbol': symbolElement,
+    'marker': markerElement,
+    'arrow': arrowElement,
+    'gradient': gradientElement,
+    'vertical_gradient': verticalGradientElement,
+    'hue_gradient': hueGradientElement,
+    'color_wheel': colorWheelElement
+}
+
+
+def styleRule(resource_id: str, declarations: str) -> str:
+    return f'.{resource_id} {{ {declarations} }}'
+
+# resources written as rules of a <style> instead of elements
+RESOURCE_RULES = {
+    'style': styleRule
+}
+
+
+def dropUnreferencedIds(elems: list[ET.Element]) -> None:
+    """Removes ids that are not referenced among the elements, such as those derived from Node names."""
+
+    referenced = set()
+    for elem in elems:
+        for e in elem.iter():
+            for name, value in e.attrib.items():
+                if name in HREF_ATTRIBUTES and value.startswith('#'):
+                    referenced.add(value[1:])
+                elif 'url(#' in value:
+                    referenced.update(URL_REFERENCE.findall(value))
+
+    for elem in elems:
+        for e in elem.iter():
+            if e.get('id') not in referenced:
+                e.attrib.pop('id', None)
+
+
+class DefsRegistry():
+    """Collects resources requested during rendering, each once, in order of their first request."""
+
+    def __init__(self) -> None:
+        self.resources = {}
+
+    def request(self, kind: str, *args: str) -> str:
+        """Registers a resource and returns its id."""
+
+        resource_id = resourceId(kind, args)
+        if resource_id not in self.resources:
+            self.resources[resource_id] = (kind, args)
+        return resource_id
+
+    def clip(self, width: str, height: str, rx: str) -> str:
+        """Requests a rounded rectangle clip path at the origin of the referencing element."""
+
+        return self.request('clip', width, height, rx)
+
+    def style(self, declarations: str) -> str:
+        """Requests a class with the CSS declarations and returns its name."""
+
+        return self.request('style', declarations)
+
+    def gradient(self, stops: list[tuple[str, str]]) -> str:
+        """Requests a horizontal gradient through (offset, color) stops."""
+
+        return self.request('gradient', *[value for stop in stops for value in stop])
+
+    def symbol(self, elems: list[ET.Element]) -> str:
+        """Requests a symbol drawing the elements, which must not have been indented."""
+
+        return self.request('symbol', ''.join(ET.tostring(elem, encoding='unicode') for elem in elems))
+
+    def requestClasses(self, elem: ET.Element) -> None:
+        """Registers the classes used within elem, so that their CSS rules are written."""
+
+        for e in elem.iter():
+            for class_name in e.get('class', '').split():
+                # classes of compiled styles are resources already
+                if class_name not in self.resources:
+                    self.request('css', class_name)
+
+    def items(self) -> tuple[tuple[str, str, tuple[str, ...]], ...]:
+        return tuple((resource_id, kind, args) for resource_id, (kind, args) in self.resources.items())
+
+    def update(self, items) -> None:
+        for resource_id, kind, args in items:
+            if resource_id not in self.resources:
+                self.resources[resource_id] = (kind, tuple(args))
+
+    def svg(self, css_rules={}) -> None | ET.Element:
+        """Returns the <defs> element with all resources, or None if there are none.
+
+        css_rules maps class names to CSS rules, which are written for the used classes."""
+
+        elements = [RESOURCE_ELEMENTS[kind](resource_id, *args) for resource_id, (kind, args) in self.resources.items() if kind in RESOURCE_ELEMENTS]
+        for elem in elements:
+            self.requestClasses(elem)
+
+        used_classes = {args[0] for kind, args in self.resources.values() if kind == 'css'}
+        rules = [rule for class_name, class_rules in css_rules.items() if class_name in used_classes for rule in class_rules]
+        # compiled styles last, they take precedence like the inline styles they replace
+        rules.extend(RESOURCE_RULES[kind](resource_id, *args) for resource_id, (kind, args) in self.resources.items() if kind in RESOURCE_RULES)
+
+        if not rules and not elements: return None
+        defs = ET.Element('defs')
+
+        if rules:
+            # applies to the whole document like the <style> at its top
+            style = ET.SubElement(defs, 'style')
+            style.text = '\n\t\t\t'.join(['', *rules, ''])
+
+        defs.extend(elements)
+        return defs
+
+
+# resources requested by the Node being rendered, replaced for every Node
+RESOURCES = DefsRegistry()
+
+
+def useSymbol(elems: list[ET.Element], **attrib) -> ET.Element:
+    """Returns a <use> of a symbol drawing the elements, to be placed instead of them.
+
+    Equal content yields the same symbol, so it is written once however often it is used. Ids are
+    dropped from the content unless it references them, as they would make all content unique."""
+
+    dropUnreferencedIds(elems)
+    return ET.Element('use', href='#'+RESOURCES.symbol(elems), attrib=attrib)
+
+
+def compileStyles(elem: ET.Element, registry: None | DefsRegistry = None) -> None:
+    """Replaces style and fill attributes within elem with classes of the same declarations.
+
+    Classes are requested from the registry, RESOURCES unless given."""
+
+    if registry is None:
+        registry = RESOURCES
+
+    for e in elem.iter():
+        declarations = []
+        # the attribute is overridden by the style
+        if (fill := e.attrib.pop('fill', None)) is not None:
+            declarations.append('fill:'+fill)
+        if (style := e.attrib.pop('style', None)) is not None:
+            declarations.extend(declaration.strip() for declaration in style.split(';') if declaration.strip())
+        if not declarations: continue
+
+        class_name = registry.style(';'.join(declarations))
+        classes = e.get('class', '').strip()
+        e.set('class', f'{classes} {class_name}' if classes else class_name)
@@ -0,0 +1,67 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+
+# Advance widths of a generic sans-serif font, used to fit text into Widgets without clipping.
+#
+# Widths are those of Helvetica/Arial (metric-compatible, and the first choices for 'sans-serif'),
+# in 1/1000 of the font size. Characters outside the table count as an average glyph.
+
+from . import constants
+
+ADVANCE_WIDTHS = {
+    ' ': 278, '!': 278, '"': 355, '#': 556, '$': 556, '%': 889, '&': 667, "'": 191,
+    '(': 333, ')': 333, '*': 389, '+': 584, ',': 278, '-': 333, '.': 278, '/': 278,
+    '0': 556, '1': 556, '2': 556, '3': 556, '4': 556, '5': 556, '6': 556, '7': 556,
+    '8': 556, '9': 556, ':': 278, ';': 278, '<': 584, '=': 584, '>': 584, '?': 556,
+    '@': 1015, 'A': 667, 'B': 667, 'C': 722, 'D': 722, 'E': 667, 'F': 611, 'G': 778,
+    'H': 722, 'I': 278, 'J': 500, 'K': 667, 'L': 556, 'M': 833, 'N': 722, 'O': 778,
+    'P': 667, 'Q': 778, 'R': 722, 'S': 667, 'T': 611, 'U': 722, 'V': 667, 'W': 944,
+    'X': 667, 'Y': 667, 'Z': 611, '[': 278, '\\': 278, ']': 278, '^': 469, '_': 556,
+    '`': 333, 'a': 556, 'b': 556, 'c': 500, 'd': 556, 'e': 556, 'f': 278, 'g': 556,
+    'h': 556, 'i': 222, 'j': 222, 'k': 500, 'l': 222, 'm': 833, 'n': 556, 'o': 556,
+    'p': 556, 'q': 556, 'r': 333, 's': 500, 't': 278, 'u': 556, 'v': 500, 'w': 722,
+    'x': 500, 'y': 500, 'z': 500, '{': 334, '|': 260, '}': 334, '~': 584,
+    '°': 400, '×': 584, '…': 1000
+}
+
+DEFAULT_ADVANCE_WIDTH = 556
+
+ELLIPSIS = '…'
+
+
+def textWidth(text: str, font_size=constants.FONT_SIZE) -> float:
+    """Returns the width of a line of text."""
+
+    return sum(ADVANCE_WIDTHS.get(c, DEFAULT_ADVANCE_WIDTH) for c in text) * font_size / 1000
+
+
+def truncate(text: str, max_width: float, font_size=constants.FONT_SIZE) -> str:
+    """Returns the text if it fits into max_width, otherwise its longest beginning that fits with an ellipsis."""
+
+    if textWidth(text, font_size) <= max_width: return text
+
+    available = max_width * 1000 / font_size - ADVANCE_WIDTHS[ELLIPSIS]
+    width = 0
+    for i, c in enumerate(text):
+        width += ADVANCE_WIDTHS.get(c, DEFAULT_ADVANCE_WIDTH)
+        if width > available:
+            return text[:i].rstrip() + ELLIPSIS if i > 0 else ''
+    return text
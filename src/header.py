@@ -20,6 +20,8 @@ This file is part of Node Exporter to SVG.
 import xml.etree.ElementTree as ET
 
 from . import constants
+from . import defs
+from .methods import svgNumber
 
 # class of SVG for a node header
 class UIHeader():
@@ -36,16 +38,16 @@ class UIHeader():
         group = ET.Element('g', id=f"Header {self.name}")
         
         ET.SubElement(group, 'rect', attrib={
-            'width':f'{self.width}',
-            'height':f'{self.height}',
+            'width':svgNumber(self.width),
+            'height':svgNumber(self.height),
             'opacity':str(opacity/100),
             'fill':self.color,
             'stroke':'none'
         })
 
-        ET.SubElement(group, 'use', href='#down_arrow', transform='translate(5,5)')
+        ET.SubElement(group, 'use', href='#'+defs.RESOURCES.request('arrow', 'down'), transform='translate(5,5)')
         
-        label = ET.SubElement(group, 'text', x=f"{self.PADDING}", y=f"{self.height*3/4}")
+        label = ET.SubElement(group, 'text', x=svgNumber(self.PADDING), y=svgNumber(self.height*3/4))
         label.text = self.name
 
         return group
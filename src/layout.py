@@ -0,0 +1,65 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+
+# Sizes of Nodes in view space, computed the way Blender lays Nodes out.
+#
+# Node.dimensions is only updated when an editor draws the tree (so it is zero or stale in
+# background mode) and is given in pixels, scaled by the UI scale and resolution. Layout is instead
+# derived from Node.width and the rendered Widget stack, which matches the editor at any UI scale.
+
+from . import constants
+
+
+def nodeWidth(node: 'NodeSnapshot') -> float:
+    """Returns the width of an expanded Node."""
+
+    return node.width
+
+
+def hiddenNodeRadius(node: 'NodeSnapshot') -> float:
+    """Returns the radius of the rounded ends of a collapsed Node, which grows with its socket count."""
+
+    sockets = max(
+        len([socket for socket in node.inputs if socket.visible]),
+        len([socket for socket in node.outputs if socket.visible])
+    )
+    return constants.HIDDEN_NODE_RADIUS + constants.HIDDEN_NODE_SOCKET_STEP * max(0, sockets - constants.HIDDEN_NODE_SOCKETS)
+
+
+def hiddenNodeSize(node: 'NodeSnapshot') -> tuple[float, float]:
+    """Returns the width and height of a collapsed Node."""
+
+    radius = hiddenNodeRadius(node)
+    return max(node.width, 2*radius), 2*radius
+
+
+def stackWidgets(widgets: list, top: float) -> tuple[list[tuple[float, 'Widget']], float]:
+    """Places Widgets below each other, starting at top.
+
+    Returns pairs of the vertical offset and the Widget, and the height of the whole Node."""
+
+    height = top + constants.TOP_PADDING
+    height_widget_pairs = []
+    for widget in widgets:
+        height_widget_pairs.append((height, widget))
+        height += widget.height() + constants.SOCKET_GAP
+
+    return height_widget_pairs, height + constants.BOTTOM_PADDING
@@ -0,0 +1,183 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+
+# Geometry of links, computed for all links of a tree at once. Uses NumPy when available
+# (it is bundled with Blender), with a pure Python fallback giving identical results.
+
+from math import sqrt
+
+from . import methods
+from .methods import formatNumber, svgNumber
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# below this many links, the overhead of NumPy outweighs its speed
+NUMPY_THRESHOLD = 64
+
+# decimals of coordinates in merged paths, unless the output is even less precise
+MERGED_DECIMALS = 1
+
+
+def curveExtrema(x0: float, x1: float, x2: float, x3: float) -> tuple[float, float]:
+    """Returns the minimum and maximum of a cubic Bézier curve in one axis, given its control points."""
+
+    lo, hi = min(x0, x3), max(x0, x3)
+
+    # roots of the derivative, a*t^2 + b*t + c (divided by 3)
+    a = -x0 + 3*x1 - 3*x2 + x3
+    b = 2*(x0 - 2*x1 + x2)
+    c = x1 - x0
+
+    if a == 0:
+        roots = [-c/b] if b != 0 else []
+    else:
+        discriminant = b*b - 4*a*c
+        if discriminant < 0: return lo, hi
+        sqrt_d = sqrt(discriminant)
+        roots = [(-b+sqrt_d)/(2*a), (-b-sqrt_d)/(2*a)]
+
+    for t in roots:
+        if not 0 < t < 1: continue
+        value = (1-t)**3*x0 + 3*(1-t)**2*t*x1 + 3*(1-t)*t**2*x2 + t**3*x3
+        lo, hi = min(lo, value), max(hi, value)
+
+    return lo, hi
+
+
+class LinkGeometry():
+    """Control points, bounds and path data of links, each given by its endpoints (from_x, from_y, to_x, to_y).
+
+    Links leave and enter sockets horizontally; curving (0-10, as in the theme) sets how far the
+    control points reach, relative to the horizontal distance of the endpoints."""
+
+    def __init__(self, endpoints: list[tuple[float, float, float, float]], curving: float) -> None:
+
+        self.count = len(endpoints)
+        self.fac = curving/10.0
+
+        self.from_x = [link[0] for link in endpoints]
+        self.from_y = [link[1] for link in endpoints]
+        self.to_x   = [link[2] for link in endpoints]
+        self.to_y   = [link[3] for link in endpoints]
+
+        self.use_numpy = np is not None and self.count >= NUMPY_THRESHOLD
+
+        if self.use_numpy:
+            self.arrays = [np.array(values, dtype=np.float64) for values in (self.from_x, self.from_y, self.to_x, self.to_y)]
+            from_x, _, to_x, _ = self.arrays
+            diff_x = np.abs(to_x - from_x)
+            self.control_x1 = from_x + self.fac*diff_x
+            self.control_x2 = to_x - self.fac*diff_x
+        else:
+            self.control_x1 = []
+            self.control_x2 = []
+            for from_x, to_x in zip(self.from_x, self.to_x):
+                diff_x = abs(to_x - from_x)
+                self.control_x1.append(from_x + self.fac*diff_x)
+                self.control_x2.append(to_x - self.fac*diff_x)
+
+    def bounds(self) -> None | tuple[float, float, float, float]:
+        """Returns the exact bounding box (min_x, min_y, max_x, max_y) of all links, or None without links."""
+
+        if not self.count: return None
+
+        # control points share the y coordinates of the endpoints, so curves are monotonic in y
+        min_y = min(min(self.from_y), min(self.to_y))
+        max_y = max(max(self.from_y), max(self.to_y))
+
+        if self.use_numpy:
+            min_x, max_x = self.extremaNumPy()
+        else:
+            min_x, max_x = float('inf'), -float('inf')
+            for x0, x1, x2, x3 in zip(self.from_x, self.control_x1, self.control_x2, self.to_x):
+                lo, hi = curveExtrema(x0, x1, x2, x3)
+                min_x, max_x = min(min_x, lo), max(max_x, hi)
+
+        return (min_x, min_y, max_x, max_y)
+
+    def extremaNumPy(self) -> tuple[float, float]:
+
+        x0, _, x3, _ = self.arrays
+        x1, x2 = self.control_x1, self.control_x2
+
+        a = -x0 + 3*x1 - 3*x2 + x3
+        b = 2*(x0 - 2*x1 + x2)
+        c = x1 - x0
+
+        quadratic = a != 0
+        discriminant = b*b - 4*a*c
+        sqrt_d = np.sqrt(np.where(discriminant > 0, discriminant, 0))
+        safe_a = np.where(quadratic, a, 1)
+        safe_b = np.where(b != 0, b, 1)
+
+        candidates = [x0, x3]
+        for root, valid in [
+            ((-b+sqrt_d)/(2*safe_a), quadratic & (discriminant >= 0)),
+            ((-b-sqrt_d)/(2*safe_a), quadratic & (discriminant >= 0)),
+            (-c/safe_b, ~quadratic & (b != 0))
+        ]:
+            valid &= (root > 0) & (root < 1)
+            t = np.where(valid, root, 0)
+            value = (1-t)**3*x0 + 3*(1-t)**2*t*x1 + 3*(1-t)*t**2*x2 + t**3*x3
+            # invalid roots fall back to the start point, which is a bound anyway
+            candidates.append(np.where(valid, value, x0))
+
+        return float(min(values.min() for values in candidates)), float(max(values.max() for values in candidates))
+
+    def pathData(self) -> list[str]:
+        """Returns the 'd' attributes of all links, in order."""
+
+        control_x1, control_x2 = self.control_x1, self.control_x2
+        if self.use_numpy:
+            # plain floats format like the pure Python path
+            control_x1, control_x2 = control_x1.tolist(), control_x2.tolist()
+
+        return [
+            f"M {svgNumber(from_x)},{svgNumber(from_y)} C {svgNumber(x1)},{svgNumber(from_y)} {svgNumber(x2)},{svgNumber(to_y)} {svgNumber(to_x)},{svgNumber(to_y)}"
+            for from_x, from_y, x1, x2, to_x, to_y in zip(self.from_x, self.from_y, control_x1, control_x2, self.to_x, self.to_y)
+        ]
+
+    def mergedPathData(self, indices: list[int]) -> str:
+        """Returns a single 'd' attribute drawing the links at indices as subpaths, in relative coordinates."""
+
+        decimals = MERGED_DECIMALS
+        if methods.NUMBER_FORMAT['decimals'] is not None:
+            decimals = min(decimals, methods.NUMBER_FORMAT['decimals'])
+
+        control_x1, control_x2 = self.control_x1, self.control_x2
+        if self.use_numpy:
+            control_x1, control_x2 = control_x1[indices].tolist(), control_x2[indices].tolist()
+        else:
+            control_x1, control_x2 = [control_x1[i] for i in indices], [control_x2[i] for i in indices]
+
+        fmt = lambda value: formatNumber(value, decimals)
+
+        subpaths = []
+        for i, x1, x2 in zip(indices, control_x1, control_x2):
+            from_x, from_y, to_x, to_y = self.from_x[i], self.from_y[i], self.to_x[i], self.to_y[i]
+            # control points lie at the heights of the endpoints
+            dy = fmt(to_y-from_y)
+            subpaths.append(f"M{fmt(from_x)},{fmt(from_y)}c{fmt(x1-from_x)},0 {fmt(x2-from_x)},{dy} {fmt(to_x-from_x)},{dy}")
+
+        return ''.join(subpaths)
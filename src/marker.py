@@ -20,6 +20,11 @@ This file is part of Node Exporter to SVG.
 
 import xml.etree.ElementTree as ET
 
+from . import constants
+from . import defs
+from . import methods
+from .methods import formatNumber
+
 class UIShape():
 
     shapes = {
@@ -48,9 +53,49 @@ class UIShape():
         })
 
         ET.SubElement(group, 'use', attrib={
-            'href':f'#marker_{self.shape}',
+            'href':'#'+defs.RESOURCES.request('marker', self.shape),
             'class':self.type
         })
-        if self.has_dot: ET.SubElement(group, 'use', href='#marker_dot', stroke='none')
+        if self.has_dot: ET.SubElement(group, 'use', href='#'+defs.RESOURCES.request('marker', 'dot'), stroke='none')
+
+        return group
+
+
+# decimals of coordinates in merged markers, unless the output is even less precise
+MERGED_DECIMALS = 1
+
+# start of the outline of each shape relative to the marker's center, and relative commands drawing it,
+# same as the shapes of the symbols (see defs.py)
+_size, _half = formatNumber(constants.MARKER_SIZE), formatNumber(constants.MARKER_SIZE/2)
+_dot, _dot_size = formatNumber(constants.MARKER_DOT_RADIUS), formatNumber(2*constants.MARKER_DOT_RADIUS)
+SUBPATHS = {
+    'circle': (-constants.MARKER_SIZE/2, 0, f'a{_half},{_half} 0 1,0 {_size},0a{_half},{_half} 0 1,0 -{_size},0z'),
+    'square': (-constants.MARKER_BOX_HALF, -constants.MARKER_BOX_HALF, f'h{_size}v{_size}h-{_size}z'),
+    'diamond': (-constants.MARKER_SIZE/2, 0, f'l{_half},-{_half}l{_half},{_half}l-{_half},{_half}z'),
+    'dot': (-constants.MARKER_DOT_RADIUS, 0, f'a{_dot},{_dot} 0 1,0 {_dot_size},0a{_dot},{_dot} 0 1,0 -{_dot_size},0z')
+}
+
+
+def mergedPathData(shape: str, centers: list[tuple[float, float]]) -> str:
+    """Returns a single 'd' attribute drawing markers of a shape (or dots) at the centers, in relative coordinates."""
+
+    decimals = MERGED_DECIMALS
+    if methods.NUMBER_FORMAT['decimals'] is not None:
+        decimals = min(decimals, methods.NUMBER_FORMAT['decimals'])
+
+    fmt = lambda value: formatNumber(value, decimals)
+    start_x, start_y, commands = SUBPATHS[shape]
+
+    subpaths = []
+    last = None
+    for x, y in centers:
+        # rounded first, so that errors of relative moves do not add up
+        x, y = round(x+start_x, decimals), round(y+start_y, decimals)
+        if last is None:
+            subpaths.append(f'M{fmt(x)},{fmt(y)}{commands}')
+        else:
+            # closing a subpath returns to its start
+            subpaths.append(f'm{fmt(x-last[0])},{fmt(y-last[1])}{commands}')
+        last = x, y
 
-        return group
\ No newline at end of file
+    return ''.join(subpaths)
@@ -18,42 +18,56 @@ This file is part of Node Exporter to SVG.
     along with this program; if not, see <https://www.gnu.org/licenses>.
 '''
 
-import mathutils
 import cmath
-import bpy
-from math import sqrt
+import hashlib
+from math import inf, hypot
 
-from .constants import HEADER_OPACITY, CATEGORY_NAMES, TEXTS, ELEMENTS, ROUND_CORNER, SOCKET_COLORS
+try:
+    import bpy
+except ImportError:
+    # rendering worker processes run outside of Blender
+    bpy = None
+
+from . import colorspace
+from .colorspace import linearRGBtoSRGB
+from .constants import HEADER_OPACITY, CATEGORY_NAMES, TEXTS, ELEMENTS, ROUND_CORNER, SOCKET_COLORS, PAGES
 
 # in: mathutils.Color with r, g, b, methods
 # out: color representation in SVG-compliant format
-def blColorToSVGColor(color: mathutils.Color) -> str:
-    r, g, b = color.r, color.g, color.b
+def blColorToSVGColor(color: 'mathutils.Color') -> str:
     # compliant with specification at p85
-    return "rgb("+",".join([str(round(x*255)) for x in [r,g,b]])+")"
+    return colorspace.COLOR_SPACE.svgColor((color.r, color.g, color.b))
+
 def colorCorrect(value: float) -> float:
-    if bpy.data.scenes[0].display_settings.display_device == 'sRGB': return linearRGBtoSRGB(value)
-    return value
+    return colorspace.COLOR_SPACE.correct(value)
 
 
-# based on: https://github.com/blender/blender/blob/594f47ecd2d5367ca936cf6fc6ec8168c2b360d0/source/blender/blenlib/intern/math_color.c
-# (which is Blender's source code)
-# it is distributed under the same license as this add-on
-def linearRGBtoSRGB(value: float) -> float:
-  if value < 0.0031308:
-    return 0.0 if value < 0.0 else value * 12.92
+def socketColorToSVGColor(color: list[float], corrected=True) -> str:
+    return colorspace.COLOR_SPACE.svgColor(color, corrected)
+    
 
-  return 1.055 * value**(1.0 / 2.4) - 0.055
+# format of all numbers written into the output, set by the Renderer for each export;
+# decimals of None keep full precision
+NUMBER_FORMAT = {'decimals': None, 'strip_zeros': True}
 
+def formatNumber(value: float, decimals: int = 2, strip_zeros=True) -> str:
+    """Returns a number rounded to decimals, by default in its shortest form without trailing zeros."""
 
-def socketColorToSVGColor(color: list[float], corrected=True) -> str:
-    if corrected:
-        return "rgb("+",".join([str(round(x*255)) for x in color[:3]])+")"
-    
-    return "rgb("+",".join([str(round(colorCorrect(x)*255)) for x in color[:3]])+")"
-    
+    s = f'{value:.{decimals}f}'
+    if strip_zeros and decimals > 0:
+        s = s.rstrip('0').rstrip('.')
+    if s.startswith('-') and not s.strip('-0.'):
+        # negative zero
+        s = s[1:]
+    return s
+
+def svgNumber(value: float) -> str:
+    """Formats a coordinate or size for the output, following NUMBER_FORMAT."""
 
-def enumName(node: bpy.types.Node, enum_name: str) -> str:
+    if NUMBER_FORMAT['decimals'] is None: return str(value)
+    return formatNumber(value, NUMBER_FORMAT['decimals'], NUMBER_FORMAT['strip_zeros'])
+
+def enumName(node: 'bpy.types.Node', enum_name: str) -> str:
     prop = node.bl_rna.properties[enum_name]
     if isinstance(prop, bpy.types.EnumProperty):
         return prop.enum_items[getattr(node, enum_name)].name
@@ -74,24 +88,33 @@ def cartesianToPolar(x: float, y: float) -> tuple[float, float]:
 def polarToCartesian(rho: float, phi: float) -> tuple[float, float]:
     return (z := cmath.rect(rho, phi)).real, z.imag
 
-def solveQuadratic(a: float, b: float, c: float) -> tuple[float, float]:
-    sqrt_d = sqrt(b**2 - 4*a*c)
-    return ((-b+sqrt_d)/(2*a), (-b-sqrt_d)/(2*a))
+def simplifyPolyline(points: list[tuple[float, float]], tolerance: float) -> list[tuple[float, float]]:
+    """Returns the points of a polyline simplified by Ramer-Douglas-Peucker, deviating at most by tolerance."""
 
-def getBezierExtrema(x0: float, x1: float, x2: float, x3: float) -> tuple[float, float]:
-    
-    bezier = lambda t: (1-t)**3*x0 + 3*(1-t)**2*t*x1 + 3*(1-t)*t**2*x2 + t**3*x3
-    
-    try:
-        t1, t2 = solveQuadratic((-3*x0 + 9*x1 - 9*x2 + 3*x3)/100.0, (6*x0 - 12*x1 + 6*x2)/100.0, (-3*x0 + 3*x1)/100.0)
-    except Exception as e:
-        print(x0, x1, x2, x3)
-        raise e
-    return (
-        bezier(t1),
-        bezier(t2)
-    )
+    if len(points) < 3: return list(points)
 
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points)-1)]
+    while stack:
+        first, last = stack.pop()
+        (x0, y0), (x1, y1) = points[first], points[last]
+        dx, dy = x1-x0, y1-y0
+        length = hypot(dx, dy)
+
+        farthest, distance = None, tolerance
+        for i in range(first+1, last):
+            x, y = points[i]
+            # from the line through the outer points
+            d = abs(dy*(x-x0) - dx*(y-y0)) / length if length else hypot(x-x0, y-y0)
+            if d > distance:
+                farthest, distance = i, d
+
+        if farthest is not None:
+            keep[farthest] = True
+            stack.extend([(first, farthest), (farthest, last)])
+
+    return [point for point, kept in zip(points, keep) if kept]
 
 def getTextColors(context):
     text_colors = {}
@@ -201,28 +224,74 @@ def getConfigurationFromContext(context) -> dict:
             color = props.socket_color_generic if props.use_generic_socket else getattr(props, 'socket_color_'+name.lower())
             output['socket_color_'+name.lower()] = socketColorToSVGColor(color)
 
+    # read once, colors are converted without bpy
+    output['display_device'] = bpy.data.scenes[0].display_settings.display_device
+
     output['noodliness'] = theme.node_editor.noodle_curving
     output['header_opacity'] = HEADER_OPACITY
 
-    return output
+    # Output
+    output['transparent_background'] = props.transparent_background
+    output['rounded_corners'] = props.rounded_corners
+    output['merge_links'] = props.merge_links
+    output['merge_markers'] = props.merge_markers
+    output['clip_text'] = props.clip_text
+    output['precision'] = props.precision if props.limit_precision else None
+    output['strip_zeros'] = props.strip_zeros
+    output['minify'] = props.minify
+    output['group_elements'] = props.group_elements
+    output['reuse_elements'] = props.reuse_elements
+    output['style_classes'] = props.style_classes
+    output['keep_metadata'] = props.keep_metadata or not props.minify
+    output['size_limits'] = getSizeLimits(props)
 
-def insertIntoSortedByKey(e, arr, key) -> list:
-    
-    if not arr: return [e]
-
-    if len(arr) == 1:
-        if key(e) > key(arr[0]): return arr + [e]
-        else: return [e] + arr
-    
-    midpoint = len(arr) // 2
+    return output
 
-    if key(e) > key(arr[midpoint-1]):
-        if key(e) < key(arr[midpoint]):
-            return arr[:midpoint] + [e] + arr[midpoint:]
-        else:
-            return arr[:midpoint+1] + insertIntoSortedByKey(e, arr[midpoint+1:], key)
-    else:
-        return insertIntoSortedByKey(e, arr[:midpoint-1], key) + arr[midpoint-1:]
+def getSizeLimits(props) -> None | tuple[float, float]:
+    """Returns the maximum width and height of the output, or None if its size is not constrained."""
+
+    match props.export_dimensions_enum:
+        case 'CUSTOM':
+            return (
+                props.export_dim_custom_width  if props.export_dim_custom_select == 'WIDTH'  else inf,
+                props.export_dim_custom_height if props.export_dim_custom_select == 'HEIGHT' else inf
+            )
+        case 'PAGE':
+            page_dims = PAGES[props.export_dim_page_type]
+            return (
+                (page_dims[1] if props.export_dim_page_landscape else page_dims[0]) * (100 - props.export_dim_page_margins) / 100,
+                (page_dims[0] if props.export_dim_page_landscape else page_dims[1]) * (100 - props.export_dim_page_margins) / 100
+            )
+        case _:
+            return None
+
+def freeze(obj, exclude=()):
+    """Converts an object into nested tuples of plain values, usable as a key or for hashing.
+
+    Objects providing a state() method are frozen through it; other objects by their attributes,
+    except those named in exclude."""
+
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        return obj
+    if isinstance(obj, type):
+        return obj.__qualname__
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(item) for item in obj)
+    if isinstance(obj, dict):
+        return tuple(sorted((str(k), freeze(v)) for k, v in obj.items() if k not in exclude))
+    if isinstance(obj, (set, frozenset)):
+        return tuple(sorted(repr(freeze(item)) for item in obj))
+    if hasattr(obj, 'state') and not exclude:
+        return obj.state()
+    if hasattr(obj, '__dict__'):
+        return (type(obj).__qualname__, freeze(vars(obj), exclude=exclude))
+    # sequences from outside this module (e.g. colors)
+    return tuple(freeze(item) for item in obj)
+
+def stateHash(*objs) -> str:
+    """Returns a stable hash of the frozen state of the objects."""
+
+    return hashlib.sha1(repr(freeze(objs)).encode('utf-8')).hexdigest()
 
 def colorStringToArray(color: str) -> tuple[float, float, float]:
     arr = []
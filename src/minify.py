@@ -0,0 +1,80 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+
+# Minification of rendered Nodes: long ids (built from Node names and Widget classes) are
+# replaced with short ones, allocated per Node, and metadata can be dropped.
+#
+# Every Node gets a prefix of letters (shortPrefix), which becomes the id of its top-level group;
+# other ids within the Node are the prefix followed by a number, so ids never collide across Nodes.
+
+import re
+from string import ascii_lowercase
+
+import xml.etree.ElementTree as ET
+
+URL_REFERENCE = re.compile(r'url\(#([^)]+)\)')
+
+HREF_ATTRIBUTES = ('href', 'xlink:href')
+
+
+def shortPrefix(index: int) -> str:
+    """Returns the index-th sequence of lowercase letters (a, b, ..., z, ba, bb, ...)."""
+
+    letters = ascii_lowercase[index % 26]
+    index //= 26
+    while index:
+        letters = ascii_lowercase[index % 26] + letters
+        index //= 26
+    return letters
+
+
+def shortenIds(elem: ET.Element, prefix: str) -> dict[str, str]:
+    """Renames ids defined within elem and references to them. Returns the new ids mapped to the old ones."""
+
+    ids = {}
+    counter = 0
+    for e in elem.iter():
+        old_id = e.get('id')
+        if old_id is None or old_id in ids: continue
+        if e is elem:
+            ids[old_id] = prefix
+        else:
+            ids[old_id] = prefix + str(counter)
+            counter += 1
+
+    replace = lambda match: f'url(#{ids.get(match.group(1), match.group(1))})'
+
+    for e in elem.iter():
+        for name, value in e.attrib.items():
+            if name == 'id':
+                e.set(name, ids[value])
+            elif name in HREF_ATTRIBUTES:
+                if value.startswith('#') and value[1:] in ids:
+                    e.set(name, '#' + ids[value[1:]])
+            elif 'url(#' in value:
+                e.set(name, URL_REFERENCE.sub(replace, value))
+
+    return {new_id: old_id for old_id, new_id in ids.items()}
+
+
+def dropMetadata(elem: ET.Element) -> None:
+    for meta in elem.findall('metadata'):
+        elem.remove(meta)
@@ -18,40 +18,25 @@ This file is part of Node Exporter to SVG.
     along with this program; if not, see <https://www.gnu.org/licenses>.
 '''
 
-import bpy
-from re import search
-import xml.etree.ElementTree as ET
 from math import pi, inf
+import xml.etree.ElementTree as ET
 import json
 
-from . import categories
 from . import constants
 from . import widgets
 from . import methods
+from . import layout
+from . import defs
 
 from .header import UIHeader
 from .marker import UIShape
 
 
-def getImageWidgetString(socket: bpy.types.NodeSocket) -> str:
-    """Returns an appropriate string representation of an object pointed to by socket."""
-
-    if not socket.default_value: return ""
-    if socket.default_value.source in ['FILE', 'SEQUENCE', 'MOVIE']:
-        return socket.default_value.filepath
-    return socket.default_value.source
-
-
-def getObjectName(socket):
-    if not socket.default_value: return ""
-    return socket.default_value.name
-
 def value_socket(socket) -> widgets.Widget:
     """Returns the representation of a value-type socket based on it being a factor subtype."""
 
-    prop = socket.bl_rna.properties['default_value']
-    if prop.subtype == 'FACTOR':
-        return widgets.Float(socket.name, socket.default_value, minmax=(prop.soft_min, prop.soft_max))
+    if socket.subtype == 'FACTOR':
+        return widgets.Float(socket.name, socket.default_value, minmax=(socket.soft_min, socket.soft_max))
     else:
         return widgets.Float(socket.name, socket.default_value)
 
@@ -61,29 +46,29 @@ SOCKET_WIDGET_DEFS = {
     'FLOAT': lambda socket: widgets.Float(name=socket.name, value=socket.default_value),
     'RGBA': lambda socket: widgets.FortySixty(wids=[
         widgets.Label(text=socket.name),
-        widgets.RGBA(color=methods.socketColorToSVGColor(socket.default_value[:3], corrected=socket.bl_rna.properties['default_value'].subtype == 'COLOR_GAMMA'))
+        widgets.RGBA(color=methods.socketColorToSVGColor(socket.default_value[:3], corrected=socket.subtype == 'COLOR_GAMMA'))
     ]),
     'VECTOR': lambda socket: widgets.Vector(name=socket.name, values=socket.default_value),
     'ROTATION': lambda socket: widgets.Vector(name=socket.name, values=socket.default_value, elem_class=widgets.Angle),
     'INT': lambda socket: value_socket(socket),
     'IMAGE': lambda socket: widgets.FortySixty(wids=[
         widgets.Label(text=socket.name),
-        widgets.Label(text=getImageWidgetString(socket), alignment='R')
+        widgets.Label(text=socket.default_value, alignment='R')
     ]),
-    'OBJECT': lambda socket: widgets.String(value="" if not socket.default_value else socket.default_value.name),
+    'OBJECT': lambda socket: widgets.String(value=socket.default_value),
     'TEXTURE': lambda socket: widgets.FortySixty(wids=[
         widgets.Label(text=socket.name),
-        widgets.Label(text=getObjectName(socket), alignment='R')
+        widgets.Label(text=socket.default_value, alignment='R')
     ]),
     'COLLECTION': lambda socket: widgets.FortySixty(wids=[
         widgets.Label(text=socket.name),
-        widgets.Label(text=getObjectName(socket), alignment='R')
+        widgets.Label(text=socket.default_value, alignment='R')
     ]),
     'GEOMETRY': lambda socket: widgets.Label(text=socket.name),
     'SHADER': lambda socket: widgets.Label(text=socket.name),
     'MATERIAL': lambda socket: widgets.FortySixty(wids=[
         widgets.Label(text=socket.name),
-        widgets.Label(text=getObjectName(socket), alignment='R')
+        widgets.Label(text=socket.default_value, alignment='R')
     ]),
     'STRING': lambda socket: widgets.String(value=socket.default_value, name=socket.name),
     'BOOLEAN': lambda socket: widgets.Boolean(name=socket.name, value=socket.default_value),
@@ -92,7 +77,7 @@ SOCKET_WIDGET_DEFS = {
     'MATRIX': lambda socket: widgets.Label(text=socket.name)
 }
 
-def widgetFactory(socket) -> widgets.Widget:
+def widgetFactory(socket: 'SocketSnapshot') -> widgets.Widget:
     """Returns a Widget representing a socket."""
     
     if socket.is_output:
@@ -107,11 +92,10 @@ class UINode():
 
     is_frame = False
 
-    def __init__(self, node: bpy.types.Node, colors = {}, args = {}) -> None:
+    def __init__(self, node: 'NodeSnapshot', colors = {}, args = {}) -> None:
         
-        self.w, self.h = node.dimensions
-        self.w *= constants.NODE_DIM_RATIO / args['scale']
-        self.h *= constants.NODE_DIM_RATIO / args['scale']
+        self.w = layout.nodeWidth(node)
+        self.h = 0
         self.x =  node.location[0]
         self.y = -node.location[1]
 
@@ -123,6 +107,10 @@ class UINode():
 
     def svg(self, header_opacity=60, use_gradient=False) -> None | ET.Element:
         return None
+
+    # everything the Node's rendered SVG depends on (anchors and sockets are rendered separately)
+    def state(self) -> tuple:
+        return methods.freeze(self, exclude=('anchors', 'inputs', 'outputs'))
     
     # return the Node's socket anchor absolute positions + shape
     def getAnchors(self):
@@ -134,38 +122,25 @@ class UINode():
 
 class UINodeSpecified(UINode):
     
-    def __init__(self, node: bpy.types.Node, colors={}, args={}) -> None:
+    def __init__(self, node: 'NodeSnapshot', colors={}, args={}) -> None:
         super().__init__(node, colors, args)
 
-        # load specification
-        self.is_placeholder = False
-        if not node.bl_idname in categories.NODE_SPECIFICATIONS:
-            self.specification = categories.NODE_SPECIFICATIONS['PlaceholderNode']
-            print(f"WARNING: Node {node.bl_idname} does not have a default specification. Placeholder object will be used instead.")
-            self.is_placeholder = True
-        else:
-            self.specification = categories.NODE_SPECIFICATIONS[node.bl_idname]
+        self.is_placeholder = node.is_placeholder
 
         # set display name
         self.type = node.bl_idname
-        self.name = node.name
-        if node.label:
-            self.name = node.label
-        elif 'name_behavior' in self.specification:
-            self.name = self.specification['name_behavior'](node)
-        elif search(r'.[0-9]{3}$', self.name): self.name = self.name[:-4]
+        self.name = node.display_name
         
-        self.outputs = [output for output in node.outputs.values() if all([not output.hide, output.enabled, not output.is_unavailable])]
-        self.inputs = [input for input in node.inputs.values() if all([not input.hide, input.enabled, not input.is_unavailable])]
+        self.outputs = [output for output in node.outputs if output.visible]
+        self.inputs = [input for input in node.inputs if input.visible]
 
         # set color class
-        self.color_class = self.specification['class']
-        if not self.color_class: self.color_class = self.specification['class_behavior'](node)
+        self.color_class = node.color_class
         try:
             self.uiheader = UIHeader(self.name, self.w, color=colors[self.color_class])
         except KeyError as KE:
             print(self.color_class)
-            print(self.specification)
+            print(self.type)
             print(colors.keys())
             raise KE
 
@@ -173,7 +148,7 @@ class UINodeSpecified(UINode):
         self.anchors = {}
 
     def svg(self, header_opacity=60, use_gradient=False) -> None | ET.Element:
-        supergroup = ET.Element('g', transform=f'translate({self.x},{self.y})', id=f'{self.id}')
+        supergroup = ET.Element('g', transform=f'translate({methods.svgNumber(self.x)},{methods.svgNumber(self.y)})', id=f'{self.id}')
         supergroup.set('class', 'spec_node')
         meta = ET.SubElement(supergroup, 'metadata')
         meta_dict = {
@@ -190,68 +165,41 @@ class UINodeSpecified(UINode):
 # class wrapper for a single node
 class UINodeRegular(UINodeSpecified):
 
-    def __init__(self, node: bpy.types.Node, colors: {str}, args = {}):
+    def __init__(self, node: 'NodeSnapshot', colors: {str}, args = {}):
         super().__init__(node, colors, args)
         
-        # new Widget stack method + coords
-        self.height_widget_pairs = []
-        self.height = self.uiheader.height + constants.TOP_PADDING
-
-        def registerWidget(widget):
-            self.height_widget_pairs.append((self.height, widget))
-            self.height += widget.height() + constants.SOCKET_GAP
-
-        def make_socket_widget(socket, is_offset):
-            self.anchors[socket.as_pointer()] = (
-                (self.w if is_offset else 0),
-                self.height+constants.LINKED_SOCKET_HEIGHT/2,
-                UIShape(socket))
+        def make_socket_widget(socket):
             try:
-                registerWidget(widgetFactory(socket))
+                return socket, widgetFactory(socket)
             except AttributeError:
                 raise Exception(node.name)
 
-        # process outputs
-        for out_socket in self.outputs:
-            make_socket_widget(out_socket, True)
-        
-        # process props
-        if self.specification:
-            if 'props' in self.specification:
-                try:
-                    for widget in self.specification['props'](node, args):
-                        if not widget: continue
-                        registerWidget(widget)
-                except:
-                    # Avoid drawing large placeholder crosses for geometry nodes
-                    # Some geometry nodes changed properties across Blender versions
-                    # and failing here would create an unnecessary X placeholder.
-                    print("Error when converting a prop of", node.name, "-- skipping placeholder for geometry node.")
-                    try:
-                        if getattr(self, 'color_class', '') != 'geometry_node':
-                            registerWidget(widgets.Placeholder())
-                    except Exception:
-                        # As a last resort, do nothing to prevent visual artifacts
-                        pass
-
-        # process inputs
-        for in_socket in self.inputs:
-            make_socket_widget(in_socket, False)
-
-        # adjust node height
-        self.h = max(self.h, self.height+constants.BOTTOM_PADDING)   
+        # Widget stack from top to bottom: outputs, props (evaluated during extraction), inputs
+        socket_widgets = [
+            *[make_socket_widget(out_socket) for out_socket in self.outputs],
+            *[(None, widget) for widget in node.props],
+            *[make_socket_widget(in_socket) for in_socket in self.inputs]
+        ]
+
+        # new Widget stack method + coords; the stack determines the Node's height
+        self.height_widget_pairs, self.h = layout.stackWidgets([widget for _, widget in socket_widgets], top=self.uiheader.height)
+
+        for (socket, _), (height, _) in zip(socket_widgets, self.height_widget_pairs):
+            if socket is None: continue
+            self.anchors[socket.ptr] = (
+                (self.w if socket.is_output else 0),
+                height+constants.LINKED_SOCKET_HEIGHT/2,
+                UIShape(socket))
 
     def svg(self, header_opacity=60, use_gradient=False) -> ET.Element:
         supergroup = super().svg(header_opacity=header_opacity, use_gradient=use_gradient)
         clip_rect = ET.Element('rect', attrib={
-            'width':str(self.w),
-            'height':str(self.h),
+            'width':methods.svgNumber(self.w),
+            'height':methods.svgNumber(self.h),
             'rx':widgets.PROPERTIES['corner_l'],
             'style':'fill:none'
         })
-        clip_id = f'{self.id}_super_clip'
-        clip = ET.SubElement(supergroup, 'clipPath', id=clip_id)
-        clip.append(clip_rect)
+        clip_id = defs.RESOURCES.clip(clip_rect.get('width'), clip_rect.get('height'), clip_rect.get('rx'))
         group = ET.SubElement(supergroup, 'g', attrib={'clip-path':f'url(#{clip_id})'})
         supergroup.append(clip_rect)
         if self.muted: supergroup.set('opacity', '0.5')
@@ -266,12 +214,24 @@ class UINodeRegular(UINodeSpecified):
         # new widgets rendering
         group.extend([widget.prepend_id(f'{self.id}_{str(i)}').svg(width=self.w, y=height, use_gradient=use_gradient) for i, (height, widget) in enumerate(self.height_widget_pairs)])
 
+        if widgets.PROPERTIES['reuse_elements']:
+            if widgets.PROPERTIES['style_classes']:
+                # content of symbols is final
+                defs.compileStyles(supergroup)
+            # only whole Widgets, styles of nested ones depend on their parent's class
+            for i, widget_elem in enumerate(group[2:], 2):
+                group[i] = defs.useSymbol(list(widget_elem), transform=widget_elem.get('transform'))
+            content = [child for child in supergroup if child.tag != 'metadata']
+            for child in content:
+                supergroup.remove(child)
+            supergroup.append(defs.useSymbol(content))
+
         return supergroup
 
     def frame(self) -> ET.Element:
         frame_items = ET.Element('g')
 
-        bg = ET.Element('rect', width=f"{self.w}", height=f"{self.h}")
+        bg = ET.Element('rect', width=methods.svgNumber(self.w), height=methods.svgNumber(self.h))
         bg.set('class', 'nodeframe')
 
         frame_items.append(bg)
@@ -280,7 +240,7 @@ class UINodeRegular(UINodeSpecified):
 
 class UIRedirectNode(UINode):
 
-    def __init__(self, node: bpy.types.Node, colors = {}, args = {}):
+    def __init__(self, node: 'NodeSnapshot', colors = {}, args = {}):
         super().__init__(node, colors, args)
         
      
@@ -292,8 +252,8 @@ class UIRedirectNode(UINode):
         self.x =  node.location[0]
         self.y = -node.location[1]
 
-        self.anchors = {node.inputs[0].as_pointer(): (0, 0, UIShape(node.inputs[0]))}
-        self.anchors.update({output.as_pointer(): (0, 0, UIShape(output, render=False)) for output in node.outputs})
+        self.anchors = {node.inputs[0].ptr: (0, 0, UIShape(node.inputs[0]))}
+        self.anchors.update({output.ptr: (0, 0, UIShape(output, render=False)) for output in node.outputs})
 
 
     def svg(self, *args, **kwargs):
@@ -303,7 +263,7 @@ class UIFrameNode(UINode):
 
     is_frame = True
 
-    def __init__(self, node: bpy.types.Node, colors={}, args={}):
+    def __init__(self, node: 'NodeSnapshot', colors={}, args={}):
         super().__init__(node, colors, args)
         
         self.name = ""
@@ -313,7 +273,7 @@ class UIFrameNode(UINode):
         self.is_empty = True
 
         # placeholder values
-        self.w, self.h = node.dimensions
+        self.w, self.h = node.width, node.height
         self.x =  node.location[0]
         self.y = -node.location[1]
 
@@ -324,7 +284,7 @@ class UIFrameNode(UINode):
 
         self.anchors = {}
 
-        self.ptr = node.as_pointer()
+        self.ptr = node.ptr
 
     def updateOnTree(self, tree):
 
@@ -362,21 +322,21 @@ class UIFrameNode(UINode):
 
         if self.is_empty: return None
 
-        group = ET.Element('g', transform=f'translate({self.x},{self.y})')
+        group = ET.Element('g', transform=f'translate({methods.svgNumber(self.x)},{methods.svgNumber(self.y)})')
         
         ET.SubElement(group, 'rect', attrib={
             'x': '0',
             'y': '0',
-            'width': str(self.w),
-            'height': str(self.h),
+            'width': methods.svgNumber(self.w),
+            'height': methods.svgNumber(self.h),
             'rx':widgets.PROPERTIES['corner_l'],
             'style':f'fill:{self.color};stroke:none;opacity:0.8'
         })
 
         if self.name:
             text = ET.SubElement(group, 'text', attrib={
-                'x':str(self.w/2),
-                'y':str(constants.LINKED_SOCKET_HEIGHT),
+                'x':methods.svgNumber(self.w/2),
+                'y':methods.svgNumber(constants.LINKED_SOCKET_HEIGHT),
                 'text-anchor':'middle'
             })
             text.text = self.name
@@ -385,8 +345,10 @@ class UIFrameNode(UINode):
 
 class UIHiddenNode(UINodeSpecified):
     
-    def __init__(self, node: bpy.types.Node, colors = {}, args={}):
+    def __init__(self, node: 'NodeSnapshot', colors = {}, args={}):
         super().__init__(node, colors, args)
+
+        self.w, self.h = layout.hiddenNodeSize(node)
         
         # prepare anchors
         for i, (t, socket) in [*enumerate(zip(len(self.inputs)*['input'], self.inputs))]+[*enumerate(zip(len(self.outputs)*['output'], self.outputs))]:
@@ -402,7 +364,7 @@ class UIHiddenNode(UINodeSpecified):
             y += self.h/2
 
             # add to anchor
-            self.anchors[socket.as_pointer()] = (x, y, UIShape(socket))
+            self.anchors[socket.ptr] = (x, y, UIShape(socket))
 
             self.color=colors[self.color_class]
 
@@ -415,29 +377,29 @@ class UIHiddenNode(UINodeSpecified):
         
         # add round rectangle base
         ET.SubElement(group, 'rect', attrib={
-            'width':str(self.w),
-            'height':str(self.h),
-            'rx':str(self.h/2),
-            'ry':str(self.h/2),
+            'width':methods.svgNumber(self.w),
+            'height':methods.svgNumber(self.h),
+            'rx':methods.svgNumber(self.h/2),
+            'ry':methods.svgNumber(self.h/2),
             'class': 'nodeframe'
         })
 
         # add round rectangle opacity overlay
         ET.SubElement(group, 'rect', attrib={
-            'width':str(self.w),
-            'height':str(self.h),
-            'rx':str(self.h/2),
-            'ry':str(self.h/2),
+            'width':methods.svgNumber(self.w),
+            'height':methods.svgNumber(self.h),
+            'rx':methods.svgNumber(self.h/2),
+            'ry':methods.svgNumber(self.h/2),
             'opacity':str(header_opacity/100),
             'fill':self.color,
             'stroke':'none'
         })
 
         # add arrow
-        ET.SubElement(group, 'use', href='#right_arrow', transform=f'translate(5,{self.h / 2 - 5})')
+        ET.SubElement(group, 'use', href='#'+defs.RESOURCES.request('arrow', 'right'), transform=f'translate(5,{methods.svgNumber(self.h / 2 - 5)})')
 
         # add name
-        label = ET.SubElement(group, 'text', x='18', y=f"{self.h/2+3}")
+        label = ET.SubElement(group, 'text', x='18', y=methods.svgNumber(self.h/2+3))
         label.text = self.name
 
         return group
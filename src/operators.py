@@ -18,12 +18,16 @@ This file is part of Node Exporter to SVG.
     along with this program; if not, see <https://www.gnu.org/licenses>.
 '''
 
-import bpy, json
+import bpy, json, os, tempfile
 import xml.etree.ElementTree as ET
 
 from .methods import getElementColors, getCategoryColors, getTextColors, getSocketColors, colorStringToArray
 from .constants import HEADER_OPACITY, IGNORE_PROPS, ELEMENTS, CATEGORY_NAMES, TEXTS, SOCKET_COLORS
 from .converter import Converter
+from .api import writeIdMap
+from .writer import openOutput
+from .cache import FRAGMENTS, FragmentCache, DiskCache, CACHE_FORMAT
+from . import bl_info
 
 
 operators = []
@@ -46,6 +50,35 @@ def resetColors(prop_group, context):
     prop_group.use_generic_text = False
    
 
+def getDiskCachePath(props, create=True) -> str:
+
+    if props.disk_cache_path:
+        return bpy.path.abspath(props.disk_cache_path)
+    try:
+        return bpy.utils.extension_path_user(__package__, path="fragment_cache", create=create)
+    except (AttributeError, ValueError):
+        # legacy add-on installs have no extension directory
+        return os.path.join(tempfile.gettempdir(), "node_exporter_svg_cache")
+
+def getFragmentCache(props) -> None | FragmentCache | DiskCache:
+    """Returns the cache of rendered fragments configured in the preferences, or None."""
+
+    fragment_cache = None
+    if props.use_fragment_cache:
+        fragment_cache = FRAGMENTS
+        fragment_cache.resize(props.fragment_cache_size * 2**20)
+
+    if props.use_disk_cache:
+        fragment_cache = DiskCache(
+            getDiskCachePath(props),
+            max_size=props.disk_cache_size * 2**20,
+            salt=(tuple(bl_info['version']), tuple(bpy.app.version), CACHE_FORMAT),
+            front=fragment_cache
+        )
+
+    return fragment_cache
+   
+
 class UIInspectOperator(bpy.types.Operator):
     bl_idname = "ui.inspector"
     bl_label = "Inspector"
@@ -110,21 +143,29 @@ class UIExportOperator(bpy.types.Operator):
 
         props = context.preferences.addons[__package__].preferences
 
-        header = b"<?xml version='1.0' encoding='utf-8'?>"
-
-        doctype = b"<!DOCTYPE svg PUBLIC \"-//W3C//DTD SVG 1.1//EN\" \"http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd\">"
-
-        tree = Converter(context).convert()
+        converter = Converter(context)
         
         abs_path = bpy.path.abspath(context.preferences.addons[__package__].preferences.output)
 
-        with open(abs_path, "wb") as f:
-            f.write(header)
-            f.write(doctype)
-            tree.write(f)
+        fragment_cache = getFragmentCache(props)
+
+        with openOutput(abs_path, props.compression_level) as f:
+            converter.writeDocument(f, workers=props.render_workers, cache=fragment_cache)
+
+        if props.minify and props.write_id_map:
+            writeIdMap(converter, abs_path)
+
+        if isinstance(fragment_cache, DiskCache):
+            fragment_cache.trim()
+
+        cache_info = ""
+        if fragment_cache is not None:
+            cache_info = f'Cache: {fragment_cache.hits} hits, {fragment_cache.misses} misses.'
+            print("Node Exporter to SVG:", cache_info)
 
         def draw(self, _):
             self.layout.label(text = f'Succesfully exported graph to {abs_path}.')
+            if cache_info: self.layout.label(text = cache_info)
 
         context.window_manager.popup_menu(draw, title='Success', icon = 'INFO')
 
@@ -142,6 +183,24 @@ class UIColorResetOperator(bpy.types.Operator):
         return {'FINISHED'}
 operators.append(UIColorResetOperator)
 
+class UIClearCacheOperator(bpy.types.Operator):
+    bl_idname = 'ui.clear_fragment_cache'
+    bl_label = "Clear Cache"
+    bl_description = "Removes all rendered Nodes from the in-memory and disk caches"
+
+    def execute(self, context):
+
+        props = context.preferences.addons[__package__].preferences
+
+        FRAGMENTS.clear()
+        # nothing stored on disk yet
+        path = getDiskCachePath(props, create=False)
+        if os.path.isdir(path):
+            DiskCache(path).clear()
+
+        return {'FINISHED'}
+operators.append(UIClearCacheOperator)
+
 def dumpProperties(group) -> dict:
 
     output = {
@@ -271,17 +330,25 @@ class UINodeImportOperator(bpy.types.Operator):
         tree = ET.parse(props.import_file)
         root = tree.getroot()
 
+        skipped = 0
         for g in root.findall('{http://www.w3.org/2000/svg}g'):
             if 'class' in g.attrib:
                 if g.attrib['class'] != 'spec_node': continue
             else:
                 continue
             meta = g.find('{http://www.w3.org/2000/svg}metadata')
+            # minified without keeping metadata
+            if meta is None or not meta.text:
+                skipped += 1
+                continue
             meta_info = json.loads(meta.text)
 
             new_node = graph.nodes.new(type=meta_info['type'])
             new_node.location = meta_info['x'], meta_info['y']
 
+        if skipped:
+            self.report({'WARNING'}, f"Skipped {skipped} Nodes without metadata, export them with Keep Metadata enabled.")
+
         return {'FINISHED'}
 operators.append(UINodeImportOperator)
 
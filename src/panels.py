@@ -70,6 +70,14 @@ class UIQualityPanel(UIPanel):
         layout.prop(props, 'use_gradients')
         layout.prop(props, 'rounded_corners')
         layout.prop(props, 'transparent_background')
+        layout.prop(props, 'merge_links')
+        layout.prop(props, 'merge_markers')
+        layout.prop(props, 'clip_text')
+        layout.prop(props, 'limit_precision')
+        col = layout.column()
+        col.enabled = props.limit_precision
+        col.prop(props, 'precision')
+        col.prop(props, 'strip_zeros')
 panels.append(UIQualityPanel)
 
 class UIOutlinePanel(UIPanel):
@@ -215,6 +223,16 @@ class UIInspectPanel(UIPanel):
 
         layout.prop(props, 'export_selected_only')
         layout.prop(props, 'export_viewport_only')
+        layout.prop(props, 'render_workers')
+        layout.prop(props, 'minify')
+        col = layout.column()
+        col.enabled = props.minify
+        col.prop(props, 'keep_metadata')
+        col.prop(props, 'write_id_map')
+        layout.prop(props, 'compression_level')
+        layout.prop(props, 'group_elements')
+        layout.prop(props, 'reuse_elements')
+        layout.prop(props, 'style_classes')
 
         layout.prop(props, 'output', text="")
 
@@ -233,6 +251,34 @@ class UIInspectPanel(UIPanel):
 panels.append(UIInspectPanel)
 
 
+class UICachePanel(UIPanel):
+    bl_parent_id = 'NODE_EDITOR_PT_export_parent'
+    bl_idname = "NODE_EDITOR_PT_cache"
+    bl_label = "Cache"
+
+    def draw(self, context):
+
+        layout = self.layout
+        props = context.preferences.addons[__package__].preferences
+
+        layout.prop(props, 'use_fragment_cache')
+
+        row = layout.row()
+        row.prop(props, 'fragment_cache_size')
+        row.enabled = props.use_fragment_cache
+
+        layout.prop(props, 'use_disk_cache')
+
+        col = layout.column()
+        col.prop(props, 'disk_cache_path')
+        col.prop(props, 'disk_cache_size')
+        col.enabled = props.use_disk_cache
+
+        layout.operator('ui.clear_fragment_cache')
+
+panels.append(UICachePanel)
+
+
 class UIConfigPanel(UIPanel):
     bl_parent_id = 'NODE_EDITOR_PT_export_parent'
     bl_idname = "NODE_EDITOR_PT_conf"
@@ -0,0 +1,128 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+import os
+import runpy
+import multiprocessing
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from . import widgets
+from . import methods
+from . import writer
+from . import minify
+from . import defs
+from . import colorspace
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), 'worker.py')
+
+# number of chunks each worker gets on average; more chunks balance uneven Nodes better
+CHUNKS_PER_WORKER = 4
+
+
+def renderElement(node_object, header_opacity=60, use_gradient=False, id_prefix=None, keep_metadata=True) -> tuple[None | ET.Element, tuple]:
+    """Renders a single Node into its top-level <g> element, minified if given a prefix of short ids.
+
+    Returns the element and the shared resources it uses (see defs.py)."""
+
+    defs.RESOURCES = defs.DefsRegistry()
+    elem = node_object.svg(header_opacity, use_gradient=use_gradient)
+    if elem is None: return None, defs.RESOURCES.items()
+    defs.RESOURCES.requestClasses(elem)
+    if id_prefix is not None:
+        minify.shortenIds(elem, id_prefix)
+    if not keep_metadata:
+        minify.dropMetadata(elem)
+    if widgets.PROPERTIES['style_classes']:
+        # after renaming ids, which may be referenced by styles
+        defs.compileStyles(elem)
+    return elem, defs.RESOURCES.items()
+
+
+def renderFragment(node_object, header_opacity=60, use_gradient=False, indent=True, id_prefix=None, keep_metadata=True) -> tuple[None | bytes, tuple]:
+    """Renders a single Node into its serialized top-level <g> element and the resources it uses."""
+
+    elem, resources = renderElement(node_object, header_opacity, use_gradient, id_prefix, keep_metadata)
+    if elem is None: return None, resources
+    return writer.serialize(elem, indent=indent), resources
+
+
+def renderChunk(state: tuple, node_objects: list, header_opacity=60, use_gradient=False, indent=True, id_prefixes=None, keep_metadata=True) -> list[tuple[None | bytes, tuple]]:
+    """Renders Nodes in a worker process, after applying the render state of their export (see renderState())."""
+
+    properties, number_format, display_device = state
+    widgets.PROPERTIES = properties
+    methods.NUMBER_FORMAT = number_format
+    if colorspace.COLOR_SPACE.display_device != display_device:
+        colorspace.COLOR_SPACE = colorspace.getColorSpace(display_device)
+
+    return [
+        renderFragment(node_object, header_opacity, use_gradient, indent, id_prefix, keep_metadata)
+        for node_object, id_prefix in zip(node_objects, id_prefixes or [None]*len(node_objects))
+    ]
+
+
+def renderState() -> tuple:
+    """Returns the globals which Nodes are rendered with, sent to the workers along with each chunk of Nodes."""
+
+    return widgets.PROPERTIES, methods.NUMBER_FORMAT, colorspace.COLOR_SPACE.display_device
+
+
+def renderPool(workers=2) -> ProcessPoolExecutor:
+    """Returns a pool of processes rendering Nodes, which may be shared by exports of any configuration.
+
+    Processes are started with the first Nodes rendered. Shut it down (or use it as a context manager) when done."""
+
+    context = multiprocessing.get_context('spawn')
+    init_globals = {
+        'PACKAGE': __package__,
+        'PACKAGE_PATH': os.path.dirname(__file__)
+    }
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=runpy.run_path, initargs=(WORKER_SCRIPT, init_globals))
+
+
+def renderFragments(node_objects: list, header_opacity=60, use_gradient=False, indent=True, id_prefixes=None, keep_metadata=True, workers=2, pool=None):
+    """Renders Nodes across a pool of processes, yielding their fragments in the original order.
+
+    Without a pool from renderPool(), one is started for these Nodes only."""
+
+    if not node_objects: return
+
+    if pool is None:
+        with renderPool(workers) as pool:
+            yield from renderFragments(node_objects, header_opacity, use_gradient, indent, id_prefixes, keep_metadata, workers, pool)
+        return
+
+    id_prefixes = id_prefixes or [None]*len(node_objects)
+    chunksize = max(1, len(node_objects) // (workers * CHUNKS_PER_WORKER))
+    starts = range(0, len(node_objects), chunksize)
+
+    results = pool.map(
+        renderChunk,
+        [renderState()]*len(starts),
+        [node_objects[i:i+chunksize] for i in starts],
+        [header_opacity]*len(starts),
+        [use_gradient]*len(starts),
+        [indent]*len(starts),
+        [id_prefixes[i:i+chunksize] for i in starts],
+        [keep_metadata]*len(starts)
+    )
+    for chunk in results:
+        yield from chunk
@@ -18,7 +18,7 @@ This file is part of Node Exporter to SVG.
     along with this program; if not, see <https://www.gnu.org/licenses>.
 '''
 
-import bpy
+import bpy, os
 
 from .constants import HEADER_OPACITY, PAGES
 
@@ -39,6 +39,89 @@ class ExportPropertyGroup(bpy.types.AddonPreferences):
         default=False
     )
 
+    # render Nodes in parallel processes
+    render_workers: bpy.props.IntProperty(
+        name="Render Processes",
+        description="Number of processes rendering Nodes in parallel. Only pays off for large trees (1 renders inside Blender)",
+        min=1, soft_max=os.cpu_count() or 1, default=1
+    )
+
+    # compact output for embedding
+    minify: bpy.props.BoolProperty(
+        name="Minify",
+        description="Write the output without indentation, XML declaration and doctype, and with short ids",
+        default=False
+    )
+
+    keep_metadata: bpy.props.BoolProperty(
+        name="Keep Metadata",
+        description="Keep the metadata of Nodes in minified output, which is needed to import their layout back",
+        default=True
+    )
+
+    write_id_map: bpy.props.BoolProperty(
+        name="Write Id Map",
+        description="Write the short ids of Nodes in minified output, mapped to their regular ids, into a .ids.json file next to the output",
+        default=False
+    )
+
+    # gzip compression of .svgz output
+    compression_level: bpy.props.IntProperty(
+        name="Compression Level",
+        description="Compression level of .svgz output (1 is fastest, 9 gives the smallest files)",
+        min=1, max=9, default=6
+    )
+
+    group_elements: bpy.props.BoolProperty(
+        name="Group Similar Elements",
+        description="Order links by color and socket markers by shape, which compresses better. Links of different colors may overlap in a different order",
+        default=False
+    )
+
+    reuse_elements: bpy.props.BoolProperty(
+        name="Reuse Identical Elements",
+        description="Define Nodes and Widgets that look the same once and reference them wherever they appear, for much smaller files of repetitive trees",
+        default=False
+    )
+
+    style_classes: bpy.props.BoolProperty(
+        name="Style Classes",
+        description="Replace inline styles and fills with shared CSS classes, for smaller files that display faster",
+        default=False
+    )
+
+    # reuse Nodes and links rendered by previous exports
+    use_fragment_cache: bpy.props.BoolProperty(
+        name="Cache Rendered Nodes",
+        description="Keep rendered Nodes and links in memory and reuse those which did not change in later exports",
+        default=False
+    )
+
+    fragment_cache_size: bpy.props.IntProperty(
+        name="Cache Size",
+        description="Maximum size of the cache of rendered Nodes (in MB)",
+        min=1, soft_max=1024, default=64
+    )
+
+    # keep rendered Nodes on disk for later Blender sessions
+    use_disk_cache: bpy.props.BoolProperty(
+        name="Disk Cache",
+        description="Also store rendered Nodes and links on disk, so they are reused across Blender sessions",
+        default=False
+    )
+
+    disk_cache_path: bpy.props.StringProperty(
+        name="Cache Directory",
+        description="Directory of the disk cache (leave empty for the add-on's default location)",
+        subtype='DIR_PATH'
+    )
+
+    disk_cache_size: bpy.props.IntProperty(
+        name="Disk Cache Size",
+        description="Maximum size of the disk cache (in MB); least recently used entries are removed after an export",
+        min=1, soft_max=16384, default=256
+    )
+
     # use rounded corners
     rounded_corners: bpy.props.BoolProperty(
         name="Round Corners",
@@ -53,6 +136,46 @@ class ExportPropertyGroup(bpy.types.AddonPreferences):
         default=True
     )
 
+    # combine links into few paths
+    merge_links: bpy.props.BoolProperty(
+        name="Merge Links",
+        description="Draw all links of the same color with a single path, for smaller files of link-heavy trees",
+        default=False
+    )
+
+    # combine socket markers into few paths
+    merge_markers: bpy.props.BoolProperty(
+        name="Merge Markers",
+        description="Draw all socket markers of the same shape and type with a single path, for smaller files of large trees",
+        default=False
+    )
+
+    # hide overflowing text by clipping instead of shortening it
+    clip_text: bpy.props.BoolProperty(
+        name="Clip Text",
+        description="Hide overflowing text with a clip path. If unchecked, long texts are shortened with an ellipsis like in Blender, which is faster to display",
+        default=True
+    )
+
+    # rounding of coordinates and sizes
+    limit_precision: bpy.props.BoolProperty(
+        name="Limit Precision",
+        description="Round coordinates and sizes in the output to a number of decimal places",
+        default=True
+    )
+
+    precision: bpy.props.IntProperty(
+        name="Decimal Places",
+        description="Number of decimal places of coordinates and sizes (0 for whole numbers)",
+        min=0, max=6, default=2
+    )
+
+    strip_zeros: bpy.props.BoolProperty(
+        name="Strip Trailing Zeros",
+        description="Write numbers in their shortest form (e.g. 12.5 instead of 12.50)",
+        default=True
+    )
+
     # graphical quality of certain elements
     fidelity: bpy.props.IntProperty(
         name="Element Quality",
@@ -0,0 +1,173 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+# Extraction of everything an export needs from a node tree into plain Python data.
+# This is the only place where RNA is read during an export; rendering works on the snapshots.
+
+from re import search
+
+from . import categories
+from . import widgets
+
+
+def getImageWidgetString(socket) -> str:
+    """Returns an appropriate string representation of an object pointed to by socket."""
+
+    if not socket.default_value: return ""
+    if socket.default_value.source in ['FILE', 'SEQUENCE', 'MOVIE']:
+        return socket.default_value.filepath
+    return socket.default_value.source
+
+
+def getObjectName(socket) -> str:
+    if not socket.default_value: return ""
+    return socket.default_value.name
+
+
+def socketValue(socket):
+    """Returns a plain copy of the default value of a socket."""
+
+    match socket.type:
+        case 'IMAGE':
+            return getImageWidgetString(socket)
+        case 'OBJECT' | 'TEXTURE' | 'COLLECTION' | 'MATERIAL':
+            return getObjectName(socket)
+        case 'RGBA' | 'VECTOR' | 'ROTATION':
+            return tuple(socket.default_value)
+        case _:
+            return socket.default_value
+
+
+class SocketSnapshot():
+
+    def __init__(self, socket) -> None:
+
+        self.ptr = socket.as_pointer()
+        self.name = socket.name
+        self.type = socket.type
+        self.display_shape = socket.display_shape
+        self.is_output = socket.is_output
+        self.is_linked = socket.is_linked
+        self.hide_value = socket.hide_value
+        self.visible = all([not socket.hide, socket.enabled, not socket.is_unavailable])
+
+        # only read values which end up being drawn
+        self.default_value = None
+        self.subtype = None
+        self.soft_min, self.soft_max = None, None
+        if self.visible and not self.is_output and not self.is_linked and not self.hide_value:
+            if 'default_value' in socket.bl_rna.properties:
+                prop = socket.bl_rna.properties['default_value']
+                self.subtype = prop.subtype
+                if self.type in ['VALUE', 'INT']:
+                    self.soft_min, self.soft_max = prop.soft_min, prop.soft_max
+                self.default_value = socketValue(socket)
+
+
+class NodeSnapshot():
+
+    def __init__(self, node, args={}) -> None:
+
+        self.ptr = node.as_pointer()
+        self.bl_idname = node.bl_idname
+        self.name = node.name
+        self.label = node.label
+
+        self.location = tuple(node.location)
+        self.width = node.width
+        self.height = node.height
+
+        self.hide = node.hide
+        self.mute = node.mute
+        self.select = node.select
+        self.parent = node.parent.as_pointer() if node.parent else None
+
+        self.use_custom_color = node.use_custom_color
+        self.color = tuple(node.color)
+
+        self.inputs = [SocketSnapshot(socket) for socket in node.inputs]
+        self.outputs = [SocketSnapshot(socket) for socket in node.outputs]
+
+        self.internal_links = []
+        if self.mute:
+            self.internal_links = [(link.from_socket.as_pointer(), link.to_socket.as_pointer()) for link in node.internal_links]
+
+        self.display_name = self.name
+        self.color_class = None
+        self.props = []
+        self.is_placeholder = False
+
+        if self.bl_idname not in ['NodeFrame', 'NodeReroute']:
+            self.readSpecification(node, args)
+
+    def readSpecification(self, node, args) -> None:
+
+        # load specification
+        if not node.bl_idname in categories.NODE_SPECIFICATIONS:
+            specification = categories.NODE_SPECIFICATIONS['PlaceholderNode']
+            print(f"WARNING: Node {node.bl_idname} does not have a default specification. Placeholder object will be used instead.")
+            self.is_placeholder = True
+        else:
+            specification = categories.NODE_SPECIFICATIONS[node.bl_idname]
+
+        # set display name
+        if node.label:
+            self.display_name = node.label
+        elif 'name_behavior' in specification:
+            self.display_name = specification['name_behavior'](node)
+        elif search(r'.[0-9]{3}$', self.name): self.display_name = self.name[:-4]
+
+        # set color class
+        self.color_class = specification['class']
+        if not self.color_class: self.color_class = specification['class_behavior'](node)
+
+        # hidden Nodes do not draw their props
+        if node.hide or not 'props' in specification: return
+
+        try:
+            self.props = [widget for widget in specification['props'](node, args) if widget]
+        except:
+            # Avoid drawing large placeholder crosses for geometry nodes
+            # Some geometry nodes changed properties across Blender versions
+            # and failing here would create an unnecessary X placeholder.
+            print("Error when converting a prop of", node.name, "-- skipping placeholder for geometry node.")
+            self.props = [] if self.color_class == 'geometry_node' else [widgets.Placeholder()]
+
+
+class TreeSnapshot():
+
+    def __init__(self, nodes: list[NodeSnapshot], links: list[tuple[int, int, bool]]) -> None:
+        self.nodes = nodes
+        self.links = links
+
+
+def extractTree(node_tree, args={}, nodes=None) -> TreeSnapshot:
+    """Copies the Nodes (all of them unless specified) and links of a node tree into a TreeSnapshot."""
+
+    if nodes is None:
+        nodes = node_tree.nodes
+
+    node_snapshots = [NodeSnapshot(node, args) for node in nodes]
+
+    links = [
+        (link.from_socket.as_pointer(), link.to_socket.as_pointer(), False) for link in node_tree.links
+    ]
+
+    return TreeSnapshot(node_snapshots, links)
@@ -0,0 +1,96 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+
+# Spatial queries over Nodes in view space (y pointing up, as in Blender), used to limit exports
+# to the viewport or any other rectangle. Rectangles are tuples (min_x, min_y, max_x, max_y).
+
+from math import floor
+
+# default edge of a grid cell, a few Nodes wide
+DEFAULT_CELL_SIZE = 400
+
+
+def nodeBounds(node_object: 'UINode') -> tuple[float, float, float, float]:
+    """Returns the rectangle a laid out Node (or Frame) covers in view space, as it is drawn."""
+
+    # laid out in SVG space, with y pointing down
+    return (node_object.x, -(node_object.y+node_object.h), node_object.x+node_object.w, -node_object.y)
+
+
+def viewRect(region) -> tuple[float, float, float, float]:
+    """Returns the rectangle of view space visible in a region, reading its transform only once."""
+
+    min_x, min_y = region.view2d.region_to_view(0, 0)
+    max_x, max_y = region.view2d.region_to_view(region.width, region.height)
+    return (min(min_x, max_x), min(min_y, max_y), max(min_x, max_x), max(min_y, max_y))
+
+
+def intersects(a, b) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class GridIndex():
+    """Uniform grid over rectangles of items; a query only visits the cells the queried rectangle covers."""
+
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE) -> None:
+        self.cell_size = cell_size
+        self.cells = {}
+        self.items = []
+        self.bounds = []
+
+    def cellRange(self, rect):
+        return (
+            range(floor(rect[0]/self.cell_size), floor(rect[2]/self.cell_size)+1),
+            range(floor(rect[1]/self.cell_size), floor(rect[3]/self.cell_size)+1)
+        )
+
+    def insert(self, item, rect) -> None:
+        i = len(self.items)
+        self.items.append(item)
+        self.bounds.append(rect)
+        cols, rows = self.cellRange(rect)
+        for col in cols:
+            for row in rows:
+                self.cells.setdefault((col, row), []).append(i)
+
+    def query(self, rect) -> list:
+        """Returns the items whose rectangles intersect rect (including touching edges), in insertion order."""
+
+        found = set()
+        cols, rows = self.cellRange(rect)
+        if len(cols)*len(rows) > len(self.cells):
+            # rectangle larger than the occupied grid
+            candidates = (i for cell in self.cells.values() for i in cell)
+        else:
+            candidates = (i for col in cols for row in rows for i in self.cells.get((col, row), ()))
+        for i in candidates:
+            if i not in found and intersects(self.bounds[i], rect):
+                found.add(i)
+        return [self.items[i] for i in sorted(found)]
+
+
+def buildNodeIndex(node_objects, cell_size=DEFAULT_CELL_SIZE) -> GridIndex:
+    """Returns an index of laid out Nodes by the rectangles they are drawn in."""
+
+    index = GridIndex(cell_size)
+    for node_object in node_objects:
+        index.insert(node_object, nodeBounds(node_object))
+    return index
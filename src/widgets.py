@@ -20,10 +20,15 @@ This file is part of Node Exporter to SVG.
 
 import xml.etree.ElementTree as ET
 from . import constants
+from . import defs
+from . import glyphs
+from . import colorspace
+from . import colorramp
+from . import curvemapping
 
 from math import pi
 
-from .methods import getFloatString, polarToCartesian, socketColorToSVGColor, enumName, insertIntoSortedByKey
+from .methods import getFloatString, polarToCartesian, socketColorToSVGColor, enumName, freeze, svgNumber, formatNumber, simplifyPolyline
 from .constants import IGNORE_PROPS
 
 from colorsys import rgb_to_hsv
@@ -33,8 +38,23 @@ from colorsys import rgb_to_hsv
 DEFAULT_WIDTH = 100.0
 DEFAULT_PADDING = 0.06
 
+CURVES_HEIGHT = 8 * constants.LINKED_SOCKET_HEIGHT
+
+# largest deviation of drawn curves from the sampled ones, in pixels
+CURVE_TOLERANCE = 0.25
+
+# number of times intervals of curves are quartered where they bend
+CURVE_REFINE_DEPTH = 2
+
+# decimals of offsets of exact ramp gradients
+RAMP_DECIMALS = 4
+
+# largest change of a color channel within bands of ramps drawn without gradients, in 8-bit levels,
+# and the number of times intervals between samples are quartered at most to stay within it
+RAMP_BAND_TOLERANCE = 4.0
+RAMP_REFINE_DEPTH = 4
+
 PROPERTIES = {}
-FLAGS = set()
 
 def dropdown(node, prop, label="") -> 'Widget':
     if not label:
@@ -62,20 +82,26 @@ def image(image) -> 'Widget':
     return String(value=image.name)
 
 def curve(curving, type='VALUE', sampling=40) -> 'Widget':
+
+    # control points read once
+    mapping = curvemapping.CurveMapping.fromMapping(curving)
     
     def evaluate_curve_n(n):
-        pairs = []
         # we can skip outermost values as they are part of curve map points
-        for N in range(1, sampling):
-            x = curving.clip_min_x + N * (curving.clip_max_x-curving.clip_min_x) * (1.0 / sampling)
-            y = curving.evaluate(curving.curves[n], x)
-            pairs.append((x, y))
+        xs = [curving.clip_min_x + N * (curving.clip_max_x-curving.clip_min_x) * (1.0 / sampling) for N in range(1, sampling)]
+        ys = mapping.evaluate(n, xs)
+        is_native = curvemapping.spotCheck(curving, n, xs, ys)
+        if not is_native:
+            print(f"WARNING: Curve {n} of a curve mapping evaluated differently than by Blender, falling back to sampling it.")
+            ys = [curving.evaluate(curving.curves[n], x) for x in xs]
 
-        
-        # insert points
-        for curve_point in curving.curves[n].points:
-            point_x, point_y = curve_point.location
-            pairs = insertIntoSortedByKey((point_x, point_y), pairs, lambda x: x[0])
+        # insert points, stable so that samples stay before points at the same position
+        pairs = sorted(list(zip(xs, ys)) + [(x, y) for x, y, _ in mapping.curves[n].points], key=lambda x: x[0])
+
+        if is_native:
+            # denser where the curve bends, by a fraction of a pixel of the widget's height
+            tolerance = CURVE_TOLERANCE / CURVES_HEIGHT * (curving.clip_max_y-curving.clip_min_y)
+            pairs = curvemapping.refineSamples(lambda xs: mapping.evaluate(n, xs), pairs, tolerance, CURVE_REFINE_DEPTH)
 
         # normalize
         norm_pairs = []
@@ -115,16 +141,24 @@ def ramp(node, n=50) -> 'Ramp':
     color_mode = node.color_ramp.color_mode
     interpolation = enumName(node.color_ramp, 'interpolation' if color_mode == 'RGB' else 'hue_interpolation') 
 
-    evals = [(i/n, node.color_ramp.evaluate(min(i/n, 1.0))) for i in range(n+1)]
+    positions = [min(i/n, 1.0) for i in range(n+1)]
+    native_ramp = colorramp.ColorRamp.fromRamp(node.color_ramp)
+    colors = native_ramp.evaluate(positions)
+    is_native = colorramp.spotCheck(node.color_ramp, positions, colors)
+    if not is_native:
+        print(f"WARNING: Color ramp of {node.name} evaluated differently than by Blender, falling back to sampling it.")
+        colors = [tuple(node.color_ramp.evaluate(x)) for x in positions]
+    evals = [(i/n, color) for i, color in enumerate(colors)]
 
-    stops=[(element.position, element.color[:3]) for element in node.color_ramp.elements]
-    for stop in stops:
-        evals = insertIntoSortedByKey(stop, evals, key=lambda x: x[0])
+    stops=[(position, color[:3]) for position, color in native_ramp.elements]
+    # stable, so samples stay before stops at the same position
+    evals = sorted(evals + stops, key=lambda x: x[0])
 
     return Ramp(color_mode=color_mode,
                         interpolation=interpolation,
                         stops=stops,
-                        evals=evals)
+                        evals=evals,
+                        color_ramp=native_ramp if is_native else None)
 
 def generateCustomProps(node):
     
@@ -183,13 +217,22 @@ class Widget():
     def __init__(self, id_prefix='') -> None:
         self.id = self.css_classname
 
+    def state(self) -> tuple:
+        # the id and last render arguments only exist once the Widget has been rendered
+        return freeze(self, exclude=('id', 'kwargs'))
+
     def prepend_id(self, prefix) -> 'Widget':
-        self.id = prefix + '_' + self.id
+        # always derived from the class name, so the same Widget can be rendered repeatedly
+        self.id = prefix + '_' + self.css_classname
         return self
     
     def height(self) -> float:
         return 0.0
 
+    def clipped(self) -> bool:
+        # content is kept within the Widget by a clip path
+        return True
+
     def fill_svg(self, elem: ET.Element, width=0) -> None:
         return
 
@@ -201,22 +244,14 @@ class Widget():
         self.kwargs = kwargs
         
         elem = ET.Element('g', id=self.id)
-        clip_id = self.id+'_clip'
         g_id = self.id+'_g'
-        clip = ET.SubElement(elem, 'clipPath', id=clip_id)
-        ET.SubElement(clip, 'rect', attrib={
-            'x':'0',
-            'y':'0',
-            'width':str(width),
-            'height':str(self.height()),
-            'rx': PROPERTIES['corner_s']
-        })
-        g = ET.SubElement(elem, 'g', id=g_id, attrib={
-            'class':self.css_classname,
-            'clip-path': f'url(#{clip_id}) '
-            })
+        attrib = {'class':self.css_classname}
+        if self.clipped():
+            clip_id = defs.RESOURCES.clip(svgNumber(width), svgNumber(self.height()), PROPERTIES['corner_s'])
+            attrib['clip-path'] = f'url(#{clip_id}) '
+        g = ET.SubElement(elem, 'g', id=g_id, attrib=attrib)
         self.fill_svg(g, width=width)
-        elem.set('transform',f'translate({x},{y})')
+        elem.set('transform',f'translate({svgNumber(x)},{svgNumber(y)})')
         return elem
 
 class Empty(Widget):
@@ -233,9 +268,9 @@ class Placeholder(Widget):
         return 4*constants.LINKED_SOCKET_HEIGHT
     
     def fill_svg(self, elem, width=0) -> ET.Element:
-        rect = ET.SubElement(elem, 'rect', x='0',   y ='0', width=str(width), height=str(self.height()))
-        line1 = ET.SubElement(elem, 'line', x1='0', y1='0', x2=str(width), y2=str(self.height()))
-        line2 = ET.SubElement(elem, 'line', x1='0', y1=str(self.height()), x2=str(width), y2='0')
+        rect = ET.SubElement(elem, 'rect', x='0',   y ='0', width=svgNumber(width), height=svgNumber(self.height()))
+        line1 = ET.SubElement(elem, 'line', x1='0', y1='0', x2=svgNumber(width), y2=svgNumber(self.height()))
+        line2 = ET.SubElement(elem, 'line', x1='0', y1=svgNumber(self.height()), x2=svgNumber(width), y2='0')
         for elem in [rect, line1, line2]:        
             elem.set('fill', 'none')
             elem.set('style', 'stroke:#cccccc;stroke-width:0.5')
@@ -255,18 +290,22 @@ class Label(Widget):
     def height(self) -> float:
         return constants.LINKED_SOCKET_HEIGHT
 
+    def clipped(self) -> bool:
+        # without clipping, the text is shortened to fit instead
+        return PROPERTIES['clip_text']
+
     def fill_svg(self, elem, width=0) -> ET.Element:        
-        label = ET.SubElement(elem, 'text', y=str(constants.SOCKET_TEXT_HEIGHT))
-        label.text = self.text
+        label = ET.SubElement(elem, 'text', y=svgNumber(constants.SOCKET_TEXT_HEIGHT))
+        label.text = self.text if PROPERTIES['clip_text'] else glyphs.truncate(str(self.text), width)
         match self.alignment:
             case 'L':
                 label.set('x', '0')
             case 'C' | 'M':
                 label.set('text-anchor', 'middle')
-                label.set('x', str(width/2.0))
+                label.set('x', svgNumber(width/2.0))
             case 'R':
                 label.set('text-anchor', 'end')
-                label.set('x', str(width))
+                label.set('x', svgNumber(width))
     
 class Boolean(Widget):
 
@@ -287,10 +326,10 @@ class Boolean(Widget):
 
         # add rectangle for checkbox
         rect = ET.SubElement(elem, 'rect', attrib={
-            'x':        str(constants.LINKED_SOCKET_HEIGHT*0.2),
-            'y':        str(constants.LINKED_SOCKET_HEIGHT*0.2),
-            'width':    str(constants.LINKED_SOCKET_HEIGHT*0.6),
-            'height':   str(constants.LINKED_SOCKET_HEIGHT*0.6),
+            'x':        svgNumber(constants.LINKED_SOCKET_HEIGHT*0.2),
+            'y':        svgNumber(constants.LINKED_SOCKET_HEIGHT*0.2),
+            'width':    svgNumber(constants.LINKED_SOCKET_HEIGHT*0.6),
+            'height':   svgNumber(constants.LINKED_SOCKET_HEIGHT*0.6),
             'stroke':   'none',
             'rx':       PROPERTIES['corner_s']
         })
@@ -301,9 +340,9 @@ class Boolean(Widget):
             check = ET.SubElement(elem,'polyline', fill='none', stroke='white')
             check.set('stroke-width', "1")
             check.set('class', 'checkmark')
-            check.set('points', f"{constants.LINKED_SOCKET_HEIGHT*0.4}, {constants.LINKED_SOCKET_HEIGHT*0.5},\
-                      {constants.LINKED_SOCKET_HEIGHT*0.5}, {constants.LINKED_SOCKET_HEIGHT*0.6},\
-                        {constants.LINKED_SOCKET_HEIGHT*0.7}, {constants.LINKED_SOCKET_HEIGHT*0.3}")
+            check.set('points', f"{svgNumber(constants.LINKED_SOCKET_HEIGHT*0.4)}, {svgNumber(constants.LINKED_SOCKET_HEIGHT*0.5)},\
+                      {svgNumber(constants.LINKED_SOCKET_HEIGHT*0.5)}, {svgNumber(constants.LINKED_SOCKET_HEIGHT*0.6)},\
+                        {svgNumber(constants.LINKED_SOCKET_HEIGHT*0.7)}, {svgNumber(constants.LINKED_SOCKET_HEIGHT*0.3)}")
         else:
             rect.set('class', 'bool_false')
 
@@ -323,7 +362,7 @@ class Columns(Widget):
         self.ratios = ratios
 
     def prepend_id(self, prefix) -> Widget:
-        self.id = prefix + '_' + self.id
+        self.id = prefix + '_' + self.css_classname
         for i, wid in enumerate(self.wids):
             wid.prepend_id(self.id+'_col'+str(i))
         return self
@@ -368,8 +407,8 @@ class Value(Widget):
         rect = ET.SubElement(elem, 'rect', attrib={
             'x': '0',
             'y': '0',
-            'width': str(width),
-            'height': str(self.height()),
+            'width': svgNumber(width),
+            'height': svgNumber(self.height()),
             'class': 'value_bar'
         })
 
@@ -382,8 +421,8 @@ class Value(Widget):
                 ET.SubElement(elem, 'rect', attrib={
                     'x': '0',
                     'y': '0',
-                    'width': str(width*proportion),
-                    'height': str(self.height()),
+                    'width': svgNumber(width*proportion),
+                    'height': svgNumber(self.height()),
                     'class': 'progress_bar'
                 })
 
@@ -415,8 +454,8 @@ class RGBA(Widget):
         color_rect = ET.SubElement(elem, 'rect')
         color_rect.set('x', '0')
         color_rect.set('y', '0')
-        color_rect.set('width', str(width))
-        color_rect.set('height', str(self.height()))
+        color_rect.set('width', svgNumber(width))
+        color_rect.set('height', svgNumber(self.height()))
         color_rect.set('fill', self.color)
     
 class Vector(Widget):
@@ -426,7 +465,7 @@ class Vector(Widget):
     def __init__(self, name="", values=[0,0,0], elem_class=Float) -> None:
         super().__init__()
         self.name = name
-        self.values = values
+        self.values = tuple(values)
         self.elem_class = elem_class
 
     def height(self):
@@ -477,13 +516,13 @@ class Dropdown(Widget):
         ET.SubElement(elem, 'rect', attrib={
                       'x':'0',
                       'y':'0',
-                      'width':str(width),
-                      'height':str(self.height()),
+                      'width':svgNumber(width),
+                      'height':svgNumber(self.height()),
                       'class':'dropdown'
         })
         
 
-        ET.SubElement(elem, 'use', href='#down_arrow', x=str(width-20.0), y=str(self.height()/2.0-6.0))
+        ET.SubElement(elem, 'use', href='#'+defs.RESOURCES.request('arrow', 'down'), x=svgNumber(width-20.0), y=svgNumber(self.height()/2.0-6.0))
         
         elem.append(Label(text=self.value).prepend_id(self.id).svg(width=width))
 
@@ -493,8 +532,7 @@ class ColorPicker(Widget):
 
     def __init__(self, color=[1.0,0.0,0.0], **kwargs) -> None:
         super().__init__(**kwargs)
-        self.color = color
-        FLAGS.add('COLOR_PICKER')
+        self.color = tuple(color)
 
     def height(self) -> float:
         return 90.0
@@ -504,10 +542,8 @@ class ColorPicker(Widget):
         # unset clipping from super element
         elem.attrib.pop('clip-path')
 
-        defs = ET.SubElement(elem, 'defs')
-        grad = ET.SubElement(defs, 'linearGradient', id='vertical_grad', x1='0', x2='0', y1='0', y2=str(self.height()), gradientUnits='userSpaceOnUse')
-        ET.SubElement(grad, 'stop', attrib={'offset':  '0%', 'stop-color':'white'})
-        ET.SubElement(grad, 'stop', attrib={'offset':'100%', 'stop-color':'black'})
+        grad_id = defs.RESOURCES.request('vertical_gradient', svgNumber(self.height()))
+        wheel_id = defs.RESOURCES.request('color_wheel', str(2*PROPERTIES['quality']), 'smooth' if PROPERTIES['use_gradient'] else 'flat')
 
         bar_width = 10.0
         wheel_space = width-bar_width-2.0
@@ -516,9 +552,9 @@ class ColorPicker(Widget):
         wheel_width = min(wheel_space, self.height())
         scale_factor = wheel_width/100.0
 
-        ET.SubElement(elem, 'rect', x=str(width-bar_width), y='0', width=str(bar_width), height=str(self.height()), style='fill:url(#vertical_grad)')
+        ET.SubElement(elem, 'rect', x=svgNumber(width-bar_width), y='0', width=svgNumber(bar_width), height=svgNumber(self.height()), style=f'fill:url(#{grad_id})')
 
-        ET.SubElement(elem, 'use', href='#color_wheel',transform=f'translate({wheel_center_x-wheel_width/2.0},{wheel_center_y-wheel_width/2.0}) scale({scale_factor})')
+        ET.SubElement(elem, 'use', href='#'+wheel_id,transform=f'translate({svgNumber(wheel_center_x-wheel_width/2.0)},{svgNumber(wheel_center_y-wheel_width/2.0)}) scale({scale_factor})')
 
         r, g, b = self.color[:3]
         #print(r, g, b)
@@ -529,12 +565,12 @@ class ColorPicker(Widget):
         polar = polarToCartesian(s, (h-0.75)*2*pi)
         x = wheel_center_x + polar[0]*(wheel_width/2)
         y = wheel_center_y + polar[1]*(wheel_width/2)
-        ET.SubElement(elem, 'circle', cx=str(x), cy=str(y), r='2', style='fill:white; stroke:black; stroke-width:0.5')
+        ET.SubElement(elem, 'circle', cx=svgNumber(x), cy=svgNumber(y), r='2', style='fill:white; stroke:black; stroke-width:0.5')
 
         # marker on bar
         x = wheel_space + 2.0 + bar_width/2.0
         y = self.height()*(1.0-v)
-        ET.SubElement(elem, 'circle', cx=str(x), cy=str(y), r='2', style='fill:white; stroke:black; stroke-width:0.5')
+        ET.SubElement(elem, 'circle', cx=svgNumber(x), cy=svgNumber(y), r='2', style='fill:white; stroke:black; stroke-width:0.5')
 
 
 class SelectBar(Widget):
@@ -555,10 +591,10 @@ class SelectBar(Widget):
         for i, opt in enumerate(self.options):
             color_class = 'value_bar' if i != self.select_index else 'progress_bar'
             rect = ET.SubElement(elem, 'rect')
-            rect.set('x', str(i*w))
+            rect.set('x', svgNumber(i*w))
             rect.set('y', '0')
-            rect.set('width', str(w))
-            rect.set('height', str(self.height()))
+            rect.set('width', svgNumber(w))
+            rect.set('height', svgNumber(self.height()))
             rect.set('class', color_class)
             
             elem.append(Label(opt, alignment='C').prepend_id(self.id+'_'+str(i)).svg(width=w, x=i*w))
@@ -572,30 +608,29 @@ class Curves(Widget):
         super().__init__()
         self.curves = curves
         self.hue_background = hue_background
-        if hue_background: FLAGS.add('HUE_GRADIENT')
 
     def height(self) -> float:
-        return 8 * constants.LINKED_SOCKET_HEIGHT
+        return CURVES_HEIGHT
     
     def fill_svg(self, elem, width=DEFAULT_WIDTH) -> ET.Element:
 
         ET.SubElement(elem, 'rect', attrib={
             'x':'0',
             'y':'0',
-            'width':str(width),
-            'height':str(self.height()),
+            'width':svgNumber(width),
+            'height':svgNumber(self.height()),
             'class':'value_bar',
-            'style':'fill:url(#hc_grad)' if self.hue_background else ''
+            'style':f'fill:url(#{defs.RESOURCES.request("hue_gradient")})' if self.hue_background else ''
         })
 
         for color, point_pairs, infill in self.curves:
             max_y = max(y for _, y in point_pairs)
-            points = [(x*width, (max_y-y)*self.height()) for x, y in point_pairs]
+            points = simplifyPolyline([(x*width, (max_y-y)*self.height()) for x, y in point_pairs], CURVE_TOLERANCE)
             style_color = '' if infill else color
             fill =   color if infill else 'none'
             if infill: points.extend([(width, self.height()),(0, self.height())])
             ET.SubElement(elem, 'polyline' if not infill else 'polygon', attrib={
-                'points':(' '.join([f'{x} {y}' for x, y in points])),
+                'points':(' '.join([f'{svgNumber(x)} {svgNumber(y)}' for x, y in points])),
                 'class':style_color,
                 'style':f'stroke-width:1; fill:{fill}'
             })
@@ -603,8 +638,8 @@ class Curves(Widget):
         ET.SubElement(elem, 'rect', attrib={
             'x':'0',
             'y':'0',
-            'width':str(width),
-            'height':str(self.height()),
+            'width':svgNumber(width),
+            'height':svgNumber(self.height()),
             'style':'fill:none; stroke:white; stroke-width:1'
         })
 
@@ -612,16 +647,48 @@ class Ramp(Widget):
     
     css_classname = 'ramp'
 
-    def __init__(self, color_mode="RGB", interpolation="Ease", stops=[], evals=[[0.0,0.0,0.0]], use_gradient=False) -> None:
+    def __init__(self, color_mode="RGB", interpolation="Ease", stops=[], evals=[[0.0,0.0,0.0]], use_gradient=False, color_ramp=None) -> None:
         super().__init__()
         self.stops=stops
         self.evals=evals
+        # drawn exactly if given, instead of from the samples
+        self.color_ramp=color_ramp
         self.use_gradient=use_gradient
         self.color_mode=color_mode
         self.interpolation=interpolation
 
     def height(self):
         return 3*constants.LINKED_SOCKET_HEIGHT
+
+    def bands(self) -> list[tuple[float, float, str]]:
+        """Returns the start, end and color of bands drawing the ramp without a gradient, adjacent ones of the same color merged."""
+
+        if self.color_ramp is not None and self.color_ramp.interpolation == 'CONSTANT':
+            # exact
+            segments = self.color_ramp.segments()
+            color_strings = colorspace.COLOR_SPACE.svgColors([color for _, _, color in segments], corrected=False)
+            bands = [(start, end, color_string) for (start, end, _), color_string in zip(segments, color_strings)]
+        elif self.color_ramp is not None:
+            # narrower where the color changes quickly
+            def evaluateLevels(positions):
+                return [colorspace.COLOR_SPACE.levels(color, corrected=False) for color in self.color_ramp.evaluate(positions)]
+            # elements are not on the ramp for all interpolations, so only their positions are used
+            positions = sorted({position for position, _ in self.evals})
+            samples = list(zip(positions, evaluateLevels(positions)))
+            samples = curvemapping.refineSamples(evaluateLevels, samples, RAMP_BAND_TOLERANCE, RAMP_REFINE_DEPTH, steps=True)
+            bands = [(start, end, colorspace.rgbString(levels)) for (start, levels), (end, _) in zip(samples[:-1], samples[1:])]
+        else:
+            color_strings = colorspace.COLOR_SPACE.svgColors([color for _, color in self.evals[:-1]], corrected=False)
+            bands = [(start, end, color_string) for (start, _), (end, _), color_string in zip(self.evals[:-1], self.evals[1:], color_strings)]
+
+        merged = []
+        for start, end, color_string in bands:
+            if end <= start: continue
+            if merged and merged[-1][2] == color_string:
+                merged[-1] = (merged[-1][0], end, color_string)
+            else:
+                merged.append((start, end, color_string))
+        return merged
     
     def fill_svg(self, elem, width=DEFAULT_WIDTH) -> ET.Element:
 
@@ -639,42 +706,41 @@ class Ramp(Widget):
         )
 
         if self.kwargs['use_gradient']:
-            
-            grad = ET.SubElement(elem, 'linearGradient', id='ramp_grad')
-            for x, color in self.evals[:-1]:
-                ET.SubElement(grad, 'stop', attrib={
-                    'offset':str(x),
-                    'stop-color':socketColorToSVGColor(color, corrected=False)
-                })
-            ET.SubElement(grad, 'stop', attrib={
-                'offset':'1',
-                'stop-color':socketColorToSVGColor(self.evals[-1][1], corrected=False)
-            })
+
+            if self.color_ramp is not None:
+                stops = self.color_ramp.gradientStops(lambda color: colorspace.COLOR_SPACE.levels(color, corrected=False))
+                grad_id = defs.RESOURCES.gradient([(formatNumber(x, RAMP_DECIMALS), colorspace.rgbString(levels)) for x, levels in stops])
+            else:
+                # all colors converted at once
+                color_strings = colorspace.COLOR_SPACE.svgColors([color for _, color in self.evals], corrected=False)
+                grad_id = defs.RESOURCES.gradient([
+                    *[(str(x), color_string) for (x, _), color_string in zip(self.evals[:-1], color_strings)],
+                    ('1', color_strings[-1])
+                ])
             ET.SubElement(elem, 'rect', attrib={
                 'x':'0',
-                'y':str(self.height()/3.0 + constants.SOCKET_GAP),
-                'width':str(width),
-                'height':str(self.height()/3.0),
-                'style':f'fill:url(#ramp_grad);stroke-width:0'
+                'y':svgNumber(self.height()/3.0 + constants.SOCKET_GAP),
+                'width':svgNumber(width),
+                'height':svgNumber(self.height()/3.0),
+                'style':f'fill:url(#{grad_id});stroke-width:0'
             })
 
         else:
-            for (start, color), (end, _) in zip(self.evals[:-1], self.evals[1:]):
+            for start, end, color_string in self.bands():
                 x_start = start * width
                 bar_width = (end-start) * width
         
-                color_string = str(socketColorToSVGColor(color, corrected=False))
                 ET.SubElement(elem, 'rect', attrib={
-                    'x':str(x_start),
-                    'y':str(self.height()/3.0 + constants.SOCKET_GAP),
-                    'width':str(bar_width),
-                    'height':str(self.height()/3.0),
+                    'x':svgNumber(x_start),
+                    'y':svgNumber(self.height()/3.0 + constants.SOCKET_GAP),
+                    'width':svgNumber(bar_width),
+                    'height':svgNumber(self.height()/3.0),
                     'style':f'fill:{color_string};stroke:{color_string};stroke-weight:0.1'
                 })
 
         # add stops
         for x, color in self.stops:
-            g = ET.SubElement(elem, 'g', attrib={'transform': f'translate({x*width-5}, {2*self.height()/3 - 2})'})
+            g = ET.SubElement(elem, 'g', attrib={'transform': f'translate({svgNumber(x*width-5)}, {svgNumber(2*self.height()/3 - 2)})'})
             ET.SubElement(g, 'polygon', attrib={
                 'points': ' '.join([str(n) for n in [
                     5,  0,
@@ -727,8 +793,8 @@ class String(Widget):
             rect = ET.SubElement(elem, 'rect', attrib={
                 'x': '0',
                 'y': '0',
-                'width': str(width),
-                'height': str(self.height()),
+                'width': svgNumber(width),
+                'height': svgNumber(self.height()),
                 'class': 'string'
             })
             
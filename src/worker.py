@@ -0,0 +1,44 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+# Bootstrap of a rendering worker process, executed through runpy.run_path().
+#
+# Worker processes are plain Python interpreters without bpy, in which the add-on's
+# package (e.g. bl_ext.user_default.<name>) cannot be imported normally. This script
+# registers the package under the same name as in Blender without running its __init__,
+# so that pickled Nodes and Widgets resolve to the bpy-free rendering modules.
+#
+# Expects globals PACKAGE and PACKAGE_PATH (see parallel.py). The globals which Nodes are rendered
+# with are sent along with each chunk of them, as a pool may render exports of different configurations.
+
+import sys
+import types
+import importlib
+
+parts = PACKAGE.split('.')
+for i in range(1, len(parts)+1):
+    name = '.'.join(parts[:i])
+    if name in sys.modules: continue
+    module = types.ModuleType(name)
+    module.__path__ = [PACKAGE_PATH] if i == len(parts) else []
+    sys.modules[name] = module
+
+# loaded before the first chunk arrives
+importlib.import_module(PACKAGE+'.parallel')
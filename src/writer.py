@@ -0,0 +1,94 @@
+'''
+Copyright (C) 2023-2024 Filip Dráber
+draberf@gmail.com
+
+This file is part of Node Exporter to SVG.
+
+    Node Exporter to SVG is free software; you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 3
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <https://www.gnu.org/licenses>.
+'''
+
+import gzip
+import xml.etree.ElementTree as ET
+
+XML_HEADER = b"<?xml version='1.0' encoding='utf-8'?>"
+
+XML_DOCTYPE = b"<!DOCTYPE svg PUBLIC \"-//W3C//DTD SVG 1.1//EN\" \"http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd\">"
+
+INDENT_SPACE = '  '
+
+SVGZ_EXTENSION = '.svgz'
+
+DEFAULT_COMPRESSION = 6
+
+
+def isCompressed(path: str) -> bool:
+    return path.lower().endswith(SVGZ_EXTENSION)
+
+
+def openOutput(path: str, compression_level=DEFAULT_COMPRESSION):
+    """Opens an output file for binary writing; .svgz files are gzip-compressed as they are written."""
+
+    if isCompressed(path):
+        # no timestamp, so that equal exports produce equal files
+        return gzip.GzipFile(path, 'wb', compresslevel=compression_level, mtime=0)
+    return open(path, 'wb')
+
+
+def splitTag(elem: ET.Element) -> tuple[bytes, bytes]:
+    """Returns the serialized start and end tags of an element, ignoring its children."""
+
+    shell = ET.Element(elem.tag, attrib=elem.attrib)
+    data = ET.tostring(shell, short_empty_elements=False)
+    end = b'</' + elem.tag.encode('us-ascii') + b'>'
+    return data[:-len(end)], end
+
+
+def serialize(elem: ET.Element, indent=True, level=1) -> bytes:
+    """Serializes a single element as it would appear nested at the given level of an indented tree."""
+
+    if indent:
+        ET.indent(elem, space=INDENT_SPACE, level=level)
+    return ET.tostring(elem)
+
+
+class SVGStreamWriter():
+    """Writes an SVG document element by element, so that only one top-level element is held at a time.
+
+    The output is byte-identical to ET.ElementTree.write() (preceded by ET.indent() if indenting)
+    of a tree made of the same root and children."""
+
+    def __init__(self, f, root: ET.Element, indent=True) -> None:
+        self.f = f
+        self.indent = indent
+        self.start, self.end = splitTag(root)
+        self.empty = True
+
+    def __enter__(self) -> 'SVGStreamWriter':
+        self.f.write(self.start)
+        return self
+
+    def write(self, elem: ET.Element) -> None:
+        self.writeBytes(serialize(elem, indent=self.indent))
+
+    def writeBytes(self, data: bytes) -> None:
+        if self.indent:
+            self.f.write(b'\n' + INDENT_SPACE.encode('us-ascii'))
+        self.f.write(data)
+        self.empty = False
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type: return
+        if self.indent and not self.empty:
+            self.f.write(b'\n')
+        self.f.write(self.end)